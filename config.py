@@ -10,6 +10,7 @@ PROJECT_ROOT = Path(__file__).parent
 DATA_RAW = PROJECT_ROOT / "data" / "raw"
 DATA_PROCESSED = PROJECT_ROOT / "data" / "processed"
 LOG_DIR = PROJECT_ROOT / "logs"
+CACHE_DIR = PROJECT_ROOT / "cache"
 
 # === Study Parameters ===
 START_DATE = "2021-09-01"
@@ -25,6 +26,18 @@ IN_THEATERS_WINDOW_DAYS = 56  # 8 weeks
 BOM_DELAY = 1.5
 RT_DELAY = 2.0
 TN_DELAY = 1.0
+RESOLVER_DELAY = 2.0  # DuckDuckGo site-search resolver (see RT_USE_SEARCH_RESOLVER)
+
+# === Concurrency (parallel workers per scraper; the request rate per host
+# is still capped by the delays above) ===
+BOM_DETAILS_CONCURRENCY = 8
+RT_CONCURRENCY = 4
+
+# === RT Page Resolution ===
+# Look each movie up with one DuckDuckGo "site:rottentomatoes.com/m" query
+# before guessing slugs. Saves RT requests for ambiguous titles, at the cost
+# of depending on a third-party search page; off by default.
+RT_USE_SEARCH_RESOLVER = False
 
 # === HTTP Headers ===
 HEADERS = {
@@ -49,10 +62,25 @@ RT_USER_AGENTS = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
 ]
 
+# === HTTP Response Cache ===
+HTTP_CACHE_EXPIRE_DAYS = 7  # successful responses are reused from disk for this long
+RT_DEAD_SLUG_EXPIRE_DAYS = 30  # RT slugs that 404'd are skipped for this long
+
+# === Connection Pooling (shared keep-alive session in utils) ===
+HTTP_POOL_CONNECTIONS = 16  # distinct hosts kept in the pool
+HTTP_POOL_MAXSIZE = 32  # open connections per host; >= the largest *_CONCURRENCY
+
+# === Checkpoint Storage ===
+# Format of the resumable scrape outputs (bom_details, rt_scores): "parquet"
+# stores a dataset directory with one part file per checkpoint batch; "csv"
+# appends rows to a single file
+CHECKPOINT_FORMAT = "parquet"
+
 # === Retry Settings ===
 MAX_RETRIES = 3
-RETRY_BACKOFF = 5  # seconds, multiplied by attempt number
+RETRY_BACKOFF = 5  # seconds, doubled after each failed attempt
 REQUEST_TIMEOUT = 30  # seconds
+MAX_RETRY_AFTER = 120  # seconds; longer Retry-After waits requested by a server are capped
 
 # === Checkpoint Settings ===
 BOM_DETAILS_CHECKPOINT_INTERVAL = 50
@@ -61,3 +89,7 @@ RT_CHECKPOINT_INTERVAL = 25
 # === Fuzzy Matching Settings ===
 FUZZY_MATCH_ACCEPT_THRESHOLD = 85
 FUZZY_MATCH_REVIEW_THRESHOLD = 70
+
+# === Report ===
+REPORT_IMAGE_FORMAT = "webp"  # embedded plot format: "webp", "svg" or "png"
+REPORT_IMAGE_DPI = 96  # raster resolution; plots are shown at ~450-530 CSS px wide
@@ -4,85 +4,88 @@ Step 1: Scrape Box Office Mojo yearly index pages.
 Fetches the yearly box office tables for 2021-2026 and extracts:
 - Movie title, BOM release ID, total gross, max theaters, release date, distributor
 
-Output: data/raw/bom_index.csv
+Output: data/raw/bom_index.parquet
 """
 
 import re
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
-from bs4 import BeautifulSoup
 import pandas as pd
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 import config
-from src.utils import make_request, parse_money, setup_logging
+from src.utils import (
+    RateLimiter, make_request, node_text, parse_html, parse_money_series, setup_logging,
+    write_table,
+)
 
 
 BOM_YEAR_URL = "https://www.boxofficemojo.com/year/{year}/"
+INDEX_WORKERS = 3
 
+_RE_RELEASE_ID = re.compile(r"/release/(rl\d+)/")
 
-def parse_year_page(html, year, logger):
-    """Parse a BOM yearly index page and return list of movie dicts."""
-    soup = BeautifulSoup(html, "lxml")
+# Numeric columns kept as raw cell text while parsing, converted in bulk later
+NUMERIC_COLUMNS = ["gross", "total_gross", "max_theaters"]
+
+
+def parse_year_page(content, year, logger):
+    """Parse a BOM yearly index page (raw bytes) and return list of movie dicts."""
+    tree = parse_html(content)
     movies = []
 
     # Find the main data table
-    table = soup.find("table")
-    if not table:
+    table = next(tree.iter("table"), None)
+    if table is None:
         logger.error(f"No table found for year {year}")
         return movies
 
-    rows = table.find_all("tr")
+    rows = list(table.iter("tr"))
     # Skip header row
     for row in rows[1:]:
-        cells = row.find_all("td")
+        cells = list(row.iter("td"))
         if len(cells) < 10:
             continue
 
         try:
             # Column 1: Release (title + link)
             title_cell = cells[1]
-            title_link = title_cell.find("a")
-            if not title_link:
+            title_link = next(title_cell.iter("a"), None)
+            if title_link is None:
                 continue
 
-            title = title_link.get_text(strip=True)
+            title = node_text(title_link)
             href = title_link.get("href", "")
 
             # Extract release ID from href like /release/rl3638199041/
-            id_match = re.search(r"/release/(rl\d+)/", href)
+            id_match = _RE_RELEASE_ID.search(href)
             if not id_match:
                 logger.debug(f"No release ID in href: {href}")
                 continue
             release_id = id_match.group(1)
 
-            # Column 5: Gross (yearly gross)
-            gross_text = cells[5].get_text(strip=True)
-            gross = parse_money(gross_text)
-
-            # Column 6: Theaters (max)
-            theaters_text = cells[6].get_text(strip=True)
-            theaters = parse_money(theaters_text)  # works for plain numbers too
-
-            # Column 7: Total Gross
-            total_gross_text = cells[7].get_text(strip=True)
-            total_gross = parse_money(total_gross_text)
+            # Columns 5-7: Gross (yearly), Theaters (max), Total Gross.
+            # Left as raw text here; scrape_bom_index parses them column-wise.
+            gross_text = node_text(cells[5])
+            theaters_text = node_text(cells[6])
+            total_gross_text = node_text(cells[7])
 
             # Column 8: Release Date (just month + day, need to combine with year)
-            release_date_text = cells[8].get_text(strip=True)
+            release_date_text = node_text(cells[8])
 
             # Column 9: Distributor
-            distributor = cells[9].get_text(strip=True)
+            distributor = node_text(cells[9])
 
             release_url = f"https://www.boxofficemojo.com/release/{release_id}/"
 
             movies.append({
                 "bom_release_id": release_id,
                 "title": title,
-                "gross": gross,
-                "total_gross": total_gross,
-                "max_theaters": theaters,
+                "gross": gross_text,
+                "total_gross": total_gross_text,
+                "max_theaters": theaters_text,
                 "release_date_raw": release_date_text,
                 "bom_year": year,
                 "distributor": distributor,
@@ -102,25 +105,44 @@ def scrape_bom_index():
     logger = setup_logging("01_scrape_bom_index")
     logger.info("Starting BOM index scrape")
 
-    all_movies = []
-
-    for year in config.BOM_YEARS:
-        url = BOM_YEAR_URL.format(year=year)
-        logger.info(f"Fetching {url}")
+    # Fetch the year pages in parallel; the shared limiter keeps requests
+    # BOM_DELAY apart while the workers overlap network latency.
+    limiter = RateLimiter(config.BOM_DELAY)
+    movies_by_year = {}
+
+    with ThreadPoolExecutor(max_workers=INDEX_WORKERS) as pool:
+        futures = {}
+        for year in config.BOM_YEARS:
+            url = BOM_YEAR_URL.format(year=year)
+            logger.info(f"Fetching {url}")
+            # Year totals change daily, so always re-fetch the index pages
+            future = pool.submit(
+                make_request, url, logger=logger,
+                force_refresh=True, limiter=limiter,
+            )
+            futures[future] = year
+
+        for future in as_completed(futures):
+            year = futures[future]
+            resp = future.result()
+            if resp is None:
+                logger.error(f"Failed to fetch year {year}")
+                continue
 
-        resp = make_request(url, delay=config.BOM_DELAY, logger=logger)
-        if resp is None:
-            logger.error(f"Failed to fetch year {year}")
-            continue
+            movies_by_year[year] = parse_year_page(resp.content, year, logger)
 
-        movies = parse_year_page(resp.text, year, logger)
-        all_movies.extend(movies)
+    # Assemble in year order so dedup below keeps the earliest year's entry
+    all_movies = []
+    for year in config.BOM_YEARS:
+        all_movies.extend(movies_by_year.get(year, []))
 
     if not all_movies:
         logger.error("No movies scraped!")
         return
 
     df = pd.DataFrame(all_movies)
+    for col in NUMERIC_COLUMNS:
+        df[col] = parse_money_series(df[col])
 
     # Deduplicate on bom_release_id (Dec releases may appear on two year pages)
     before = len(df)
@@ -130,9 +152,9 @@ def scrape_bom_index():
         logger.info(f"Removed {before - after} duplicate release IDs")
 
     # Save
-    output_path = config.DATA_RAW / "bom_index.csv"
+    output_path = config.DATA_RAW / "bom_index.parquet"
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(output_path, index=False)
+    write_table(df, output_path)
     logger.info(f"Saved {len(df)} movies to {output_path}")
 
     # Summary
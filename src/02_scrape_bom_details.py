@@ -7,67 +7,94 @@ For each movie in the BOM index, fetches the detailed release page to get:
 - Total domestic gross
 - MPAA rating, genres, release date, distributor
 
-Supports checkpoint/resume for the ~890 requests.
-
-Input:  data/raw/bom_index.csv
-Output: data/raw/bom_details.csv
+Release pages are fetched concurrently (config.BOM_DETAILS_CONCURRENCY
+in flight, sharing one BOM_DELAY rate limiter) and parsed in a process
+pool so the CPU-bound HTML parsing runs on all cores. Supports
+checkpoint/resume for the ~890 requests.
+
+Input:  data/raw/bom_index.parquet
+Output: data/raw/bom_details.parquet (dataset directory, one part per checkpoint;
+        bom_details.csv with config.CHECKPOINT_FORMAT = "csv")
 """
 
 import re
 import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
 
-from bs4 import BeautifulSoup
-import pandas as pd
+from lxml import etree
 from tqdm import tqdm
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 import config
 from src.utils import (
-    make_request, parse_money, setup_logging,
-    load_checkpoint, save_checkpoint,
+    RateLimiter, make_request, node_text, parse_html, parse_money, read_table,
+    setup_logging, checkpoint_path, load_checkpoint, save_checkpoint,
+)
+
+
+# Summary divs: <div class="a-section a-spacing-none"> with a direct <span> label
+_SUMMARY_DIV_XPATH = etree.XPath(
+    "//div[contains(concat(' ', normalize-space(@class), ' '), ' a-section ')"
+    " and contains(concat(' ', normalize-space(@class), ' '), ' a-spacing-none ')]"
+    "[span]"
 )
 
+# Visible page text (what BeautifulSoup's get_text() returns): no script/style
+_PAGE_TEXT_XPATH = etree.XPath("//text()[not(ancestor::script or ancestor::style)]")
 
-def get_summary_div_text(soup, label_text):
+# Patterns used on every page, compiled once
+_RE_THEATERS = re.compile(r"([\d,]+)\s*theaters?", re.IGNORECASE)
+_RE_NUMBER = re.compile(r"[\d,]+")
+_RE_OPENING_FALLBACK = re.compile(
+    r"Opening.*?(\$[\d,]+).*?([\d,]+)\s*theaters", re.DOTALL | re.IGNORECASE
+)
+_RE_DOMESTIC_FALLBACK = re.compile(r"Domestic\s*\([^)]*\)\s*\$?([\d,]+)", re.DOTALL)
+_RE_GENRE_SPLIT = re.compile(r"\s{2,}")
+_RE_DATE_HREF = re.compile(r"\?date=\d{4}-\d{2}-\d{2}")
+
+
+def build_summary_map(tree):
     """
-    Find a BOM summary div by its label span and return the parent div's
-    pipe-separated text parts (excluding the label itself).
+    Map each BOM summary div's label to the div's stripped text parts
+    (excluding the label itself), in a single pass over the summary divs.
 
     BOM page structure: <div class="a-section a-spacing-none">
                            <span>Label</span>
                            <span>Value content</span>
                         </div>
 
-    Returns list of text parts after the label, or empty list.
+    Keys are the label span's whitespace-normalized text, e.g. "Opening" or
+    "Domestic (38.4%)"; the first div wins if a label repeats.
+    """
+    summary = {}
+    for div in _SUMMARY_DIV_XPATH(tree):
+        label = " ".join(div.find("span").text_content().split())
+        if not label or label in summary:
+            continue
+        parts = [t.strip() for t in div.itertext() if t.strip()]
+        summary[label] = parts[1:]
+    return summary
+
+
+def get_summary_div_text(summary, label_text):
+    """
+    Return the text parts after a label from build_summary_map's output.
+
+    Tries the exact label first, then the first label starting with it
+    (e.g., "Domestic (38.4%)" for "Domestic ("). Returns [] if absent.
     """
-    # Find span with exact label text
-    label = soup.find("span", string=re.compile(rf"^\s*{re.escape(label_text)}\s*$"))
-    if not label:
-        # Try partial match (e.g., "Domestic (" starts with "Domestic")
-        for span in soup.find_all("span"):
-            if span.get_text(strip=True).startswith(label_text):
-                label = span
-                break
-    if not label:
-        return []
-
-    # Get the parent div's full text, split by pipe separator
-    parent = label.parent
-    if not parent:
-        return []
-
-    parts = parent.get_text(separator="|", strip=True).split("|")
-    # Find the label part and return everything after it
-    for i, part in enumerate(parts):
-        if part.strip().startswith(label_text):
-            return [p.strip() for p in parts[i + 1:] if p.strip()]
-    return []
-
-
-def parse_release_page(html, logger):
+    parts = summary.get(label_text)
+    if parts is None:
+        parts = next(
+            (v for k, v in summary.items() if k.startswith(label_text)), []
+        )
+    return parts
+
+
+def parse_release_page(content):
     """
-    Parse a BOM individual release page.
+    Parse a BOM individual release page from its raw response bytes.
 
     BOM uses Amazon UI framework with consistent div structure:
     - "Opening" div contains: "$154,201,673" and "4,440 theaters"
@@ -76,46 +103,47 @@ def parse_release_page(html, logger):
     - "Distributor" div contains: "Walt Disney Studios Motion Pictures", "See full..."
     - "Genres" div contains genre names separated by whitespace
 
+    Runs in worker processes, so it must stay a picklable top-level function.
     Returns dict with all parsed fields.
     """
-    soup = BeautifulSoup(html, "lxml")
+    tree = parse_html(content)
+    summary = build_summary_map(tree)
     result = {}
+    page_text = None  # full visible text; built at most once, only if a fallback needs it
 
     # --- Opening weekend gross + theaters ---
-    opening_parts = get_summary_div_text(soup, "Opening")
+    opening_parts = get_summary_div_text(summary, "Opening")
     result["opening_wknd_gross"] = None
     result["opening_wknd_theaters"] = None
     for part in opening_parts:
         if "$" in part:
             result["opening_wknd_gross"] = parse_money(part)
-        theater_match = re.search(r"([\d,]+)\s*theaters?", part, re.IGNORECASE)
+        theater_match = _RE_THEATERS.search(part)
         if theater_match:
             result["opening_wknd_theaters"] = parse_money(theater_match.group(1))
 
     # If theaters not found in parts, try full text near Opening
     if result["opening_wknd_theaters"] is None:
-        page_text = soup.get_text()
-        m = re.search(
-            r"Opening.*?(\$[\d,]+).*?([\d,]+)\s*theaters",
-            page_text, re.DOTALL | re.IGNORECASE
-        )
+        if page_text is None:
+            page_text = "".join(_PAGE_TEXT_XPATH(tree))
+        m = _RE_OPENING_FALLBACK.search(page_text)
         if m:
             if result["opening_wknd_gross"] is None:
                 result["opening_wknd_gross"] = parse_money(m.group(1))
             result["opening_wknd_theaters"] = parse_money(m.group(2))
 
     # --- Widest release ---
-    widest_parts = get_summary_div_text(soup, "Widest Release")
+    widest_parts = get_summary_div_text(summary, "Widest Release")
     result["widest_release"] = None
     for part in widest_parts:
-        num_match = re.search(r"[\d,]+", part)
+        num_match = _RE_NUMBER.search(part)
         if num_match:
             result["widest_release"] = parse_money(num_match.group())
             break
 
     # --- Domestic gross ---
     # The div text looks like: "Domestic (|38.4%|)|$652,980,194"
-    domestic_parts = get_summary_div_text(soup, "Domestic (")
+    domestic_parts = get_summary_div_text(summary, "Domestic (")
     result["domestic_gross"] = None
     for part in domestic_parts:
         if "$" in part:
@@ -124,30 +152,29 @@ def parse_release_page(html, logger):
 
     # Fallback: regex on page text
     if result["domestic_gross"] is None:
-        dom_match = re.search(
-            r"Domestic\s*\([^)]*\)\s*\$?([\d,]+)",
-            soup.get_text(), re.DOTALL
-        )
+        if page_text is None:
+            page_text = "".join(_PAGE_TEXT_XPATH(tree))
+        dom_match = _RE_DOMESTIC_FALLBACK.search(page_text)
         if dom_match:
             result["domestic_gross"] = parse_money(dom_match.group(1))
 
     # --- MPAA Rating ---
-    mpaa_parts = get_summary_div_text(soup, "MPAA")
+    mpaa_parts = get_summary_div_text(summary, "MPAA")
     if mpaa_parts:
         result["mpaa_rating"] = mpaa_parts[0]
     else:
         result["mpaa_rating"] = None
 
     # --- Genres ---
-    genres_parts = get_summary_div_text(soup, "Genres")
+    genres_parts = get_summary_div_text(summary, "Genres")
     if not genres_parts:
-        genres_parts = get_summary_div_text(soup, "Genre")
+        genres_parts = get_summary_div_text(summary, "Genre")
     if genres_parts:
         # Genres may come as separate parts or as one string with whitespace
         all_genres = []
         for part in genres_parts:
             # Split on whitespace in case they're concatenated
-            for g in re.split(r"\s{2,}", part):
+            for g in _RE_GENRE_SPLIT.split(part):
                 g = g.strip()
                 if g:
                     all_genres.append(g)
@@ -156,19 +183,23 @@ def parse_release_page(html, logger):
         result["genres"] = None
 
     # --- Release Date ---
-    date_parts = get_summary_div_text(soup, "Release Date")
+    date_parts = get_summary_div_text(summary, "Release Date")
     if date_parts:
         result["release_date"] = date_parts[0]
     else:
         # Look for date links with ?date= parameter
-        date_link = soup.find("a", href=re.compile(r"\?date=\d{4}-\d{2}-\d{2}"))
-        if date_link:
-            result["release_date"] = date_link.get_text(strip=True)
+        date_link = next(
+            (a for a in tree.iter("a")
+             if _RE_DATE_HREF.search(a.get("href", ""))),
+            None,
+        )
+        if date_link is not None:
+            result["release_date"] = node_text(date_link)
         else:
             result["release_date"] = None
 
     # --- Distributor ---
-    dist_parts = get_summary_div_text(soup, "Distributor")
+    dist_parts = get_summary_div_text(summary, "Distributor")
     if dist_parts:
         # First part is the distributor name; exclude "See full company information"
         result["distributor"] = dist_parts[0]
@@ -178,67 +209,90 @@ def parse_release_page(html, logger):
     return result
 
 
+def scrape_release(row, release_id, parser_pool, limiter, logger):
+    """
+    Fetch one BOM release page and parse it in the process pool.
+
+    `limiter` is the RateLimiter shared by all fetch threads.
+    """
+    url = row.release_url
+    resp = make_request(url, logger=logger, limiter=limiter)
+
+    if resp is None or resp.status_code != 200:
+        logger.warning(f"Failed to fetch {url}")
+        return {
+            "bom_release_id": release_id,
+            "title": row.title,
+            "opening_wknd_gross": None,
+            "opening_wknd_theaters": None,
+            "widest_release": None,
+            "domestic_gross": None,
+            "mpaa_rating": None,
+            "genres": None,
+            "release_date": None,
+            "distributor": None,
+        }
+
+    details = parser_pool.submit(parse_release_page, resp.content).result()
+    details["bom_release_id"] = release_id
+    details["title"] = row.title
+    return details
+
+
 def scrape_bom_details():
     """Main function to scrape individual BOM release pages."""
     logger = setup_logging("02_scrape_bom_details")
     logger.info("Starting BOM details scrape")
 
     # Load the index
-    index_path = config.DATA_RAW / "bom_index.csv"
+    index_path = config.DATA_RAW / "bom_index.parquet"
     if not index_path.exists():
         logger.error(f"Index file not found: {index_path}. Run 01_scrape_bom_index.py first.")
         return
 
-    index_df = pd.read_csv(index_path)
+    index_df = read_table(index_path)
     logger.info(f"Loaded {len(index_df)} movies from index")
 
     # Check for existing checkpoint
-    output_path = config.DATA_RAW / "bom_details.csv"
+    output_path = checkpoint_path("bom_details")
     _, processed_ids = load_checkpoint(output_path)
     if processed_ids:
         logger.info(f"Resuming: {len(processed_ids)} already scraped")
 
+    # Drop already-scraped releases up front so progress reflects real work
+    todo = index_df[
+        ~index_df["bom_release_id"].astype(str).isin(processed_ids)
+    ].reset_index(drop=True)
+    logger.info(f"{len(todo)} release pages remaining")
+
     # Scrape each movie's detail page
     batch = []
-    total = len(index_df)
-    skipped = 0
-
-    for i, row in tqdm(index_df.iterrows(), total=total, desc="Scraping BOM details"):
-        release_id = str(row["bom_release_id"])
 
-        if release_id in processed_ids:
-            skipped += 1
-            continue
+    # The fetch threads only overlap latency and parsing; the shared limiter
+    # keeps BOM at one request per BOM_DELAY, as in a sequential loop
+    limiter = RateLimiter(config.BOM_DELAY)
 
-        url = row["release_url"]
-        resp = make_request(url, delay=config.BOM_DELAY, logger=logger)
-
-        if resp is None or resp.status_code != 200:
-            logger.warning(f"Failed to fetch {url}")
-            details = {
-                "bom_release_id": release_id,
-                "title": row["title"],
-                "opening_wknd_gross": None,
-                "opening_wknd_theaters": None,
-                "widest_release": None,
-                "domestic_gross": None,
-                "mpaa_rating": None,
-                "genres": None,
-                "release_date": None,
-                "distributor": None,
-            }
-        else:
-            details = parse_release_page(resp.text, logger)
-            details["bom_release_id"] = release_id
-            details["title"] = row["title"]
-
-        batch.append(details)
-
-        # Checkpoint
-        if len(batch) >= config.BOM_DETAILS_CHECKPOINT_INTERVAL:
-            save_checkpoint(batch, output_path, logger)
-            processed_ids.update(d["bom_release_id"] for d in batch)
-            batch = []
+    with ProcessPoolExecutor() as parser_pool, \
+            ThreadPoolExecutor(max_workers=config.BOM_DETAILS_CONCURRENCY) as pool:
+        futures = []
+        rows = todo[["bom_release_id", "title", "release_url"]].itertuples(
+            index=False, name="IdxRow"
+        )
+        for row in rows:
+            release_id = str(row.bom_release_id)
+            futures.append(
+                pool.submit(scrape_release, row, release_id, parser_pool, limiter, logger)
+            )
+
+        for future in tqdm(as_completed(futures), total=len(futures),
+                           desc="Scraping BOM details"):
+            batch.append(future.result())
+
+            # Checkpoint
+            if len(batch) >= config.BOM_DETAILS_CHECKPOINT_INTERVAL:
+                save_checkpoint(batch, output_path, logger)
+                processed_ids.update(d["bom_release_id"] for d in batch)
+                batch = []
 
     # Save remaining
     if batch:
@@ -246,7 +300,7 @@ def scrape_bom_details():
 
     # Final summary
     if output_path.exists():
-        final_df = pd.read_csv(output_path)
+        final_df = read_table(output_path, columns=["opening_wknd_gross"])
         n_with_opening = final_df["opening_wknd_gross"].notna().sum()
         logger.info(
             f"Done. {len(final_df)} total movies scraped. "
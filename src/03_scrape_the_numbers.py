@@ -4,70 +4,69 @@ Step 3: Scrape The Numbers production budget database.
 Paginates through the full budget table to build a comprehensive
 lookup of movie budgets, domestic gross, and worldwide gross.
 
-Output: data/raw/the_numbers_budgets.csv
+Output: data/raw/the_numbers_budgets.parquet
 """
 
 import re
 import sys
 from pathlib import Path
 
-from bs4 import BeautifulSoup
 import pandas as pd
 from tqdm import tqdm
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 import config
-from src.utils import make_request, parse_money, parse_date, normalize_title, setup_logging
+from src.utils import (
+    make_request, node_text, parse_date_series, parse_html, parse_money_series,
+    normalize_title, setup_logging, write_table,
+)
 
 
 BASE_URL = "https://www.the-numbers.com/movie/budgets/all"
 ROWS_PER_PAGE = 100
 
+# Money columns kept as raw cell text while parsing, converted in bulk later
+MONEY_COLUMNS = ["production_budget", "domestic_gross", "worldwide_gross"]
 
-def parse_budget_page(html, logger):
-    """Parse a single page of The Numbers budget table."""
-    soup = BeautifulSoup(html, "lxml")
+
+def parse_budget_page(content, logger):
+    """Parse a single page (raw bytes) of The Numbers budget table."""
+    tree = parse_html(content)
     movies = []
 
     # Find the main data table
-    table = soup.find("table")
-    if not table:
+    table = next(tree.iter("table"), None)
+    if table is None:
         logger.warning("No table found on page")
         return movies
 
-    rows = table.find_all("tr")
-    for row in rows:
-        cells = row.find_all("td")
+    for row in table.iter("tr"):
+        cells = list(row.iter("td"))
         if len(cells) < 6:
             continue
 
         try:
             # Columns: Rank, Release Date, Movie, Production Budget,
             #          Domestic Gross, Worldwide Gross
-            rank_text = cells[0].get_text(strip=True)
-            release_date_text = cells[1].get_text(strip=True)
-            title = cells[2].get_text(strip=True)
-            budget_text = cells[3].get_text(strip=True)
-            domestic_text = cells[4].get_text(strip=True)
-            worldwide_text = cells[5].get_text(strip=True)
+            rank_text = node_text(cells[0])
+            release_date_text = node_text(cells[1])
+            title = node_text(cells[2])
+            budget_text = node_text(cells[3])
+            domestic_text = node_text(cells[4])
+            worldwide_text = node_text(cells[5])
 
             # Parse rank
             rank = None
             if rank_text.isdigit():
                 rank = int(rank_text)
 
-            # Parse date and extract year
-            release_date = parse_date(release_date_text)
-            release_year = release_date.year if release_date else None
-
             movies.append({
                 "tn_rank": rank,
                 "title": title,
-                "release_date": str(release_date) if release_date else release_date_text,
-                "release_year": release_year,
-                "production_budget": parse_money(budget_text),
-                "domestic_gross": parse_money(domestic_text),
-                "worldwide_gross": parse_money(worldwide_text),
+                "release_date": release_date_text,
+                "production_budget": budget_text,
+                "domestic_gross": domestic_text,
+                "worldwide_gross": worldwide_text,
                 "title_normalized": normalize_title(title),
             })
 
@@ -99,7 +98,7 @@ def scrape_the_numbers():
                 logger.warning(f"Failed to fetch page at offset {offset}")
                 break
 
-            movies = parse_budget_page(resp.text, logger)
+            movies = parse_budget_page(resp.content, logger)
             if not movies:
                 logger.info(f"No more data at offset {offset}. Stopping.")
                 break
@@ -119,11 +118,21 @@ def scrape_the_numbers():
         return
 
     df = pd.DataFrame(all_movies)
+    for col in MONEY_COLUMNS:
+        df[col] = parse_money_series(df[col])
+
+    # Dates are parsed column-wide once scraping is done; unparseable dates
+    # keep their page text and get no release_year
+    parsed = parse_date_series(df["release_date"])
+    df.insert(
+        df.columns.get_loc("release_date") + 1, "release_year", parsed.dt.year.astype("float64")
+    )
+    df["release_date"] = parsed.dt.strftime("%Y-%m-%d").fillna(df["release_date"])
 
     # Save
-    output_path = config.DATA_RAW / "the_numbers_budgets.csv"
+    output_path = config.DATA_RAW / "the_numbers_budgets.parquet"
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(output_path, index=False)
+    write_table(df, output_path)
 
     # Summary stats
     logger.info(f"Saved {len(df)} movies to {output_path}")
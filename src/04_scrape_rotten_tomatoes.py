@@ -2,37 +2,86 @@
 Step 4: Scrape Rotten Tomatoes scores for each movie.
 
 For each movie from the BOM data, finds its RT page using:
+  0. DuckDuckGo site-search resolver (only if config.RT_USE_SEARCH_RESOLVER)
   1. Direct URL slug construction (primary)
   2. RT search page fallback
 
 Extracts: Tomatometer, Audience Score, critic/audience review counts,
 genres, MPAA rating.
 
-Input:  data/raw/bom_details.csv (or bom_index.csv if details not ready)
-Output: data/raw/rt_scores.csv
+Input:  data/raw/bom_details.parquet (or bom_index.parquet if details not ready)
+Output: data/raw/rt_scores.parquet (dataset directory, one part per checkpoint)
 """
 
-import json
+import html
 import random
 import re
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from urllib.parse import quote_plus
 
-from bs4 import BeautifulSoup
+import orjson
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+from rapidfuzz import fuzz, process
+from rapidfuzz.utils import default_process
 from tqdm import tqdm
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 import config
 from src.utils import (
-    make_request, parse_date, setup_logging,
-    load_checkpoint, save_checkpoint,
+    make_request, node_text, parse_date_series, parse_html, read_table, setup_logging,
+    checkpoint_path, load_checkpoint, save_checkpoint,
 )
 
 
+# Compiled once at import; extract_rt_data and the slug/search helpers run
+# these on every page.
+# Slug cleaning: delete apostrophes and punctuation in one translate, then
+# collapse any run of whitespace/underscores into a single underscore
+_SLUG_DELETE = str.maketrans("", "", "'\":,.!?;()[]{}")
+_RE_SLUG_SEPARATORS = re.compile(r"[\s_]+")
+# Search-page scans over the raw response bytes: <a> tags pointing at a
+# /m/ movie page (href, inner HTML), quoted "/m/slug" strings in embedded
+# JS/JSON, and tags to strip from link text
+_RE_MOVIE_LINK = re.compile(
+    rb"""<a\b[^>]*?\bhref=["']([^"']*/m/[^"'/][^"']*)["'][^>]*>(.*?)</a>""",
+    re.S | re.I,
+)
+_RE_SCRIPT_SLUG = re.compile(rb'"/m/([^"]+)"')
+_RE_TAG = re.compile(rb"<[^>]*>")
+
+# RT movie URL in a search-engine result page, plain or percent-encoded
+# inside a redirect link
+_RE_RESOLVED_SLUG = re.compile(
+    rb"rottentomatoes\.com(?:/|%2F)m(?:/|%2F)([\w-]+)", re.I
+)
+
+# Fallback field patterns run on the raw response bytes (no decode needed)
+_RE_CRITIC_SCORE = re.compile(rb'"criticsScore"\s*:\s*\{[^}]*?"score"\s*:\s*"(\d+)"')
+_RE_AUDIENCE_SCORE = re.compile(rb'"audienceScore"\s*:\s*\{[^}]*?"score"\s*:\s*"(\d+)"')
+_RE_CRITIC_BLOCK = re.compile(rb'"criticsScore"\s*:\s*(\{[^}]+\})')
+_RE_AUDIENCE_BLOCK = re.compile(rb'"audienceScore"\s*:\s*(\{[^}]+\})')
+_RE_REVIEW_COUNT = re.compile(rb'"reviewCount"\s*:\s*(\d+)')
+_RE_RATING_COUNT = re.compile(rb'"ratingCount"\s*:\s*(\d+)')
+_RE_GENRES = re.compile(rb'"metadataGenres"\s*:\s*\[(.*?)\]')
+_RE_CONTENT_RATING = re.compile(rb'"contentRating"\s*:\s*"([^"]+)"')
+
+RT_HOME_URL = "https://www.rottentomatoes.com"
+RESOLVER_URL = "https://html.duckduckgo.com/html/"
+RT_SEARCH_URL = "https://www.rottentomatoes.com/search"
+
+# Slugs that returned 404, as slug -> unix time of the 404. Persisted so
+# resumed and repeated runs don't re-request them; entries expire so pages
+# RT creates later (e.g. for new releases) are picked up again.
+DEAD_SLUGS_PATH = config.DATA_RAW / "rt_dead_slugs.json"
+
+# Minimum token_set_ratio (0-100) for a search result to count as a match
+SEARCH_MATCH_CUTOFF = 60
+
+
 # --- Slug construction ---
 
 def construct_rt_slugs(title, year=None):
@@ -49,18 +98,35 @@ def construct_rt_slugs(title, year=None):
 
     Returns list of candidate slugs, most likely first.
     """
-    candidates = []
-
     slug = title.lower().strip()
     slug = slug.replace("&", "and")
-    slug = slug.replace("'", "")
-    slug = slug.replace("'", "")  # curly apostrophe
-    slug = re.sub(r"[\":,\.!?;()\[\]{}]", "", slug)
-    slug = re.sub(r"\s+", "_", slug)
-    slug = re.sub(r"_+", "_", slug)
+    slug = slug.translate(_SLUG_DELETE)
+    slug = _RE_SLUG_SEPARATORS.sub("_", slug)
     slug = slug.strip("_")
 
-    candidates.append(slug)
+    return slug_candidates(slug, year)
+
+
+def construct_base_slugs(titles):
+    """
+    Column-wise version of the base-slug rules in construct_rt_slugs.
+
+    Builds the slug for a whole Series of titles with pandas string methods
+    in one pass; feed each result to slug_candidates.
+    """
+    return (
+        titles.str.lower()
+        .str.strip()
+        .str.replace("&", "and", regex=False)
+        .str.translate(_SLUG_DELETE)
+        .str.replace(_RE_SLUG_SEPARATORS, "_", regex=True)
+        .str.strip("_")
+    )
+
+
+def slug_candidates(slug, year=None):
+    """Expand a base slug into the candidate slugs to try, most likely first."""
+    candidates = [slug]
 
     # Try with hyphens replaced by underscores
     if "-" in slug:
@@ -73,24 +139,85 @@ def construct_rt_slugs(title, year=None):
             candidates.append(f"{slug.replace('-', '_')}_{year}")
 
     # Remove duplicates while preserving order
-    seen = set()
-    unique = []
-    for c in candidates:
-        if c not in seen:
-            seen.add(c)
-            unique.append(c)
-
-    return unique
+    return list(dict.fromkeys(candidates))
 
 
 # --- Score extraction ---
 
-def extract_rt_data(html):
+def _find_key(node, key):
+    """Return the first value stored under `key` anywhere in parsed JSON."""
+    if isinstance(node, dict):
+        if key in node:
+            return node[key]
+        children = node.values()
+    elif isinstance(node, list):
+        children = node
+    else:
+        return None
+    for child in children:
+        found = _find_key(child, key)
+        if found is not None:
+            return found
+    return None
+
+
+def _as_int(value):
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return None
+
+
+def extract_next_data(script_text, result):
     """
-    Extract scores, counts, genres, and rating from an RT movie page.
+    Fill `result` from the page's __NEXT_DATA__ JSON blob.
 
-    Looks for embedded JSON data in the page source containing
-    criticsScore, audienceScore, metadataGenres, contentRating.
+    One JSON parse replaces the regex scans over the whole page. Returns
+    False (leaving `result` untouched) if the blob is unparseable or carries
+    no score data, so the caller can fall back to the regex path.
+    """
+    try:
+        data = orjson.loads(script_text)
+    except (orjson.JSONDecodeError, TypeError):
+        return False
+    if isinstance(data, dict):
+        data = data.get("props", {}).get("pageProps", data)
+
+    critics = _find_key(data, "criticsScore")
+    audience = _find_key(data, "audienceScore")
+    if not isinstance(critics, dict) and not isinstance(audience, dict):
+        return False
+
+    if isinstance(critics, dict):
+        result["tomatometer"] = _as_int(critics.get("score"))
+        result["critic_count"] = _as_int(critics.get("reviewCount"))
+    if isinstance(audience, dict):
+        result["audience_score"] = _as_int(audience.get("score"))
+        count = _as_int(audience.get("ratingCount"))
+        if count is None:
+            count = _as_int(audience.get("reviewCount"))
+        result["audience_count"] = count
+
+    genres = _find_key(data, "metadataGenres")
+    if isinstance(genres, list):
+        result["rt_genres"] = ", ".join(str(g) for g in genres)
+
+    rating = _find_key(data, "contentRating")
+    if isinstance(rating, str):
+        result["rt_rating"] = rating
+
+    return True
+
+
+def extract_rt_data(content):
+    """
+    Extract scores, counts, genres, and rating from an RT movie page
+    (raw response bytes).
+
+    Reads the Next.js __NEXT_DATA__ JSON blob when the page has one;
+    otherwise scans the page source with regexes for the embedded
+    criticsScore, audienceScore, metadataGenres, contentRating fields.
     """
     result = {
         "tomatometer": None,
@@ -103,78 +230,105 @@ def extract_rt_data(html):
     }
 
     # Extract page title for validation
-    soup = BeautifulSoup(html, "lxml")
-    title_tag = soup.find("title")
-    if title_tag:
+    tree = parse_html(content)
+    title_tag = next(tree.iter("title"), None)
+    if title_tag is not None:
         # RT titles are like "Inside Out 2 | Rotten Tomatoes"
-        result["rt_title"] = title_tag.get_text(strip=True).split("|")[0].strip()
+        result["rt_title"] = node_text(title_tag).split("|")[0].strip()
+
+    next_data = tree.find('.//script[@id="__NEXT_DATA__"]')
+    if next_data is not None and extract_next_data(next_data.text, result):
+        return result
 
     # --- Critics score ---
-    critic_match = re.search(
-        r'"criticsScore"\s*:\s*\{[^}]*?"score"\s*:\s*"(\d+)"', html
-    )
+    critic_match = _RE_CRITIC_SCORE.search(content)
     if critic_match:
         result["tomatometer"] = int(critic_match.group(1))
 
     # --- Audience score ---
-    audience_match = re.search(
-        r'"audienceScore"\s*:\s*\{[^}]*?"score"\s*:\s*"(\d+)"', html
-    )
+    audience_match = _RE_AUDIENCE_SCORE.search(content)
     if audience_match:
         result["audience_score"] = int(audience_match.group(1))
 
     # --- Critic review count ---
     # Look specifically in the criticsScore block
-    critic_block = re.search(r'"criticsScore"\s*:\s*(\{[^}]+\})', html)
+    critic_block = _RE_CRITIC_BLOCK.search(content)
     if critic_block:
-        count_match = re.search(r'"reviewCount"\s*:\s*(\d+)', critic_block.group(1))
+        count_match = _RE_REVIEW_COUNT.search(critic_block.group(1))
         if count_match:
             result["critic_count"] = int(count_match.group(1))
 
     # --- Audience rating count ---
-    audience_block = re.search(r'"audienceScore"\s*:\s*(\{[^}]+\})', html)
+    audience_block = _RE_AUDIENCE_BLOCK.search(content)
     if audience_block:
         # Try ratingCount first (numeric)
-        count_match = re.search(r'"ratingCount"\s*:\s*(\d+)', audience_block.group(1))
+        count_match = _RE_RATING_COUNT.search(audience_block.group(1))
         if count_match:
             result["audience_count"] = int(count_match.group(1))
         else:
             # Try reviewCount
-            count_match = re.search(r'"reviewCount"\s*:\s*(\d+)', audience_block.group(1))
+            count_match = _RE_REVIEW_COUNT.search(audience_block.group(1))
             if count_match:
                 result["audience_count"] = int(count_match.group(1))
 
     # --- Genres ---
-    genres_match = re.search(r'"metadataGenres"\s*:\s*\[(.*?)\]', html)
+    genres_match = _RE_GENRES.search(content)
     if genres_match:
         try:
-            genres_raw = "[" + genres_match.group(1) + "]"
-            genres = json.loads(genres_raw)
+            genres_raw = b"[" + genres_match.group(1) + b"]"
+            genres = orjson.loads(genres_raw)
             result["rt_genres"] = ", ".join(genres)
-        except json.JSONDecodeError:
-            result["rt_genres"] = genres_match.group(1).replace('"', '').strip()
+        except orjson.JSONDecodeError:
+            raw = genres_match.group(1).decode("utf-8", errors="replace")
+            result["rt_genres"] = raw.replace('"', '').strip()
 
     # --- Content rating ---
-    rating_match = re.search(r'"contentRating"\s*:\s*"([^"]+)"', html)
+    rating_match = _RE_CONTENT_RATING.search(content)
     if rating_match:
-        result["rt_rating"] = rating_match.group(1)
+        result["rt_rating"] = rating_match.group(1).decode("utf-8", errors="replace")
 
     return result
 
 
 # --- Page finding strategies ---
 
-def try_direct_url(slug, session, headers, logger):
+def load_dead_slugs(path=DEAD_SLUGS_PATH):
+    """Load the unexpired 404 slugs recorded by previous runs."""
+    try:
+        recorded = orjson.loads(path.read_bytes())
+    except (FileNotFoundError, orjson.JSONDecodeError):
+        return {}
+    cutoff = time.time() - config.RT_DEAD_SLUG_EXPIRE_DAYS * 86400
+    return {slug: ts for slug, ts in recorded.items() if ts >= cutoff}
+
+
+def save_dead_slugs(dead_slugs, path=DEAD_SLUGS_PATH):
+    """Persist the 404 slugs atomically (write a temp file, then rename)."""
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(orjson.dumps(dict(dead_slugs)))
+    tmp.replace(path)
+
+
+def try_direct_url(slug, session, headers, logger, dead_slugs=None):
     """
     Try fetching an RT movie page directly by slug.
+
+    Slugs in `dead_slugs` are skipped without a request, and a 404 adds
+    the slug to it.
+
     Returns (response, url) or (None, None).
     """
+    if dead_slugs is not None and slug in dead_slugs:
+        return None, None
+
     url = f"https://www.rottentomatoes.com/m/{slug}"
     resp = make_request(
         url, headers=headers,
         delay=config.RT_DELAY + random.uniform(0, 1.5),
         session=session, logger=logger,
     )
+    if resp is not None and resp.status_code == 404 and dead_slugs is not None:
+        dead_slugs[slug] = time.time()
     if resp and resp.status_code == 200:
         # Verify it's actually a movie page (not a redirect to search)
         if "/m/" in resp.url and "search" not in resp.url:
@@ -182,220 +336,305 @@ def try_direct_url(slug, session, headers, logger):
     return None, None
 
 
+def resolve_rt_slug(title, year, logger):
+    """
+    Look up a movie's RT slug with a DuckDuckGo site:rottentomatoes.com/m
+    query. Returns the slug of the first RT movie result, or None.
+
+    Goes through the shared cached session, so repeat runs reuse the
+    stored result page instead of querying again.
+    """
+    query = f"site:rottentomatoes.com/m {title}"
+    if year:
+        query += f" {year}"
+    resp = make_request(
+        RESOLVER_URL, params={"q": query},
+        delay=config.RESOLVER_DELAY, logger=logger,
+    )
+    if resp is None or resp.status_code != 200:
+        return None
+    match = _RE_RESOLVED_SLUG.search(resp.content)
+    return match.group(1).decode("ascii").lower() if match else None
+
+
 def try_search(title, year, session, headers, logger):
     """
     Search RT for a movie and return the best matching URL.
     Returns (url, match_quality) or (None, None).
     """
-    search_url = f"https://www.rottentomatoes.com/search?search={quote_plus(title)}"
     resp = make_request(
-        search_url, headers=headers,
+        RT_SEARCH_URL, params={"search": title}, headers=headers,
         delay=config.RT_DELAY + random.uniform(0, 1.5),
         session=session, logger=logger,
     )
     if not resp or resp.status_code != 200:
         return None, None
 
-    # Parse search results for movie links
-    soup = BeautifulSoup(resp.text, "lxml")
-
-    # Find all /m/ links in the page
-    movie_links = []
-    for a_tag in soup.find_all("a", href=re.compile(r"/m/[^/]+")):
-        href = a_tag.get("href", "")
-        link_text = a_tag.get_text(strip=True)
-        if href and link_text:
+    # Only the movie links and slugs are needed, so scan the raw bytes
+    # rather than building a DOM for the whole search page
+    content = resp.content
+
+    # Find all /m/ links in the page, as url -> link text (first text wins)
+    movie_links = {}
+    for href, inner in _RE_MOVIE_LINK.findall(content):
+        # Same text as the stripped, concatenated text nodes of the <a>
+        link_text = b"".join(part.strip() for part in _RE_TAG.split(inner))
+        link_text = html.unescape(link_text.decode("utf-8", errors="replace"))
+        if link_text:
+            href = html.unescape(href.decode("utf-8", errors="replace"))
             # Normalize the href
             if href.startswith("/"):
                 href = f"https://www.rottentomatoes.com{href}"
-            movie_links.append((href, link_text))
+            movie_links.setdefault(href, link_text)
 
     # Also try extracting from embedded JS/JSON data
     # RT search pages sometimes have data in script tags
-    for script in soup.find_all("script"):
-        script_text = script.get_text()
-        slug_matches = re.findall(r'"/m/([^"]+)"', script_text)
-        for slug in slug_matches:
-            url = f"https://www.rottentomatoes.com/m/{slug}"
-            if url not in [ml[0] for ml in movie_links]:
-                movie_links.append((url, slug.replace("_", " ")))
+    for slug in _RE_SCRIPT_SLUG.findall(content):
+        slug = slug.decode("utf-8", errors="replace")
+        url = f"https://www.rottentomatoes.com/m/{slug}"
+        movie_links.setdefault(url, slug.replace("_", " "))
 
     if not movie_links:
         return None, None
 
-    # Score each result against our title + year
-    title_lower = title.lower().strip()
-    best_url = None
-    best_score = 0
+    # Score each result against our title; token_set_ratio tolerates
+    # punctuation, word order and extra words like "(2024)". The title is
+    # normalised once here rather than once per candidate.
+    query = default_process(title)
+    year_str = str(year) if year else None
+    scored = process.extract(
+        query, movie_links, scorer=fuzz.token_set_ratio,
+        processor=default_process, score_cutoff=SEARCH_MATCH_CUTOFF, limit=None,
+    )
 
-    for url, link_text in movie_links:
-        text_lower = link_text.lower().strip()
-        # Simple scoring: exact match > contains > partial
-        if text_lower == title_lower:
-            score = 100
-        elif title_lower in text_lower or text_lower in title_lower:
-            score = 80
-        else:
-            # Word overlap
-            title_words = set(title_lower.split())
-            text_words = set(text_lower.split())
-            if title_words and text_words:
-                overlap = len(title_words & text_words) / max(len(title_words), len(text_words))
-                score = int(overlap * 70)
-            else:
-                score = 0
+    # Nothing can beat an exact title match that also gets the year bonus
+    perfect = (100 + (10 if year_str else 0), 100)
 
+    best_url = None
+    best_score = 0
+    best_key = None
+    for link_text, score, url in scored:
         # Bonus for year match in URL
-        if year and str(year) in url:
+        if year_str and year_str in url:
             score += 10
-
-        if score > best_score:
-            best_score = score
+        # token_set_ratio scores "Inside Out" and "Inside Out 2" alike, so
+        # break ties on the plain edit-distance ratio
+        key = (score, fuzz.ratio(query, default_process(link_text)))
+        if best_key is None or key > best_key:
+            best_key = key
             best_url = url
+            best_score = score
+            if key >= perfect:
+                break
 
-    if best_url and best_score >= 50:
+    if best_url:
         return best_url, best_score
     return None, None
 
 
+# One header dict per User-Agent, built once. Treat them as read-only:
+# they are shared between worker threads and across movies.
+_HEADER_POOL = [
+    {**config.HEADERS, "User-Agent": ua} for ua in config.RT_USER_AGENTS
+]
+
+
 def get_rt_headers(session_index=0):
     """Get headers with a rotated User-Agent."""
-    ua = config.RT_USER_AGENTS[session_index % len(config.RT_USER_AGENTS)]
-    headers = config.HEADERS.copy()
-    headers["User-Agent"] = ua
-    return headers
+    return _HEADER_POOL[session_index % len(_HEADER_POOL)]
+
+
+def make_rt_session(logger):
+    """
+    Create the requests.Session used for all RT lookups.
+
+    Its connection pool holds one keep-alive connection per worker thread,
+    and a homepage visit up front pays the TLS handshake and collects RT's
+    cookies before the first movie is looked up.
+    """
+    session = requests.Session()
+    session.mount(
+        "https://",
+        HTTPAdapter(pool_connections=1, pool_maxsize=config.RT_CONCURRENCY,
+                    max_retries=0),
+    )
+    try:
+        session.get(RT_HOME_URL, headers=get_rt_headers(0), timeout=15)
+    except requests.RequestException as e:
+        logger.warning(f"RT warm-up request failed: {e}")
+    return session
 
 
 # --- Main scraper ---
 
+def release_years(values):
+    """Years of a column of BOM release_date values (None if missing/unparseable)."""
+    years = parse_date_series(values).dt.year
+    return [None if pd.isna(y) else int(y) for y in years]
+
+
+def scrape_movie(release_id, title, slug, year, ua_index, session, logger,
+                 dead_slugs=None):
+    """Find one movie's RT page and extract its scores. Runs in a worker thread."""
+    # Rotate user agent per movie
+    headers = get_rt_headers(ua_index)
+
+    found_resp = None
+    found_url = None
+    match_method = "unmatched"
+
+    # Strategy 0 (opt-in): resolve the slug with one site-restricted search
+    if config.RT_USE_SEARCH_RESOLVER:
+        resolved = resolve_rt_slug(title, year, logger)
+        if resolved:
+            resp, url = try_direct_url(resolved, session, headers, logger, dead_slugs)
+            if resp:
+                found_resp = resp
+                found_url = url
+                match_method = "resolver"
+
+    # Strategy 1: Direct URL construction
+    if not found_resp:
+        for slug in slug_candidates(slug, year):
+            resp, url = try_direct_url(slug, session, headers, logger, dead_slugs)
+            if resp:
+                found_resp = resp
+                found_url = url
+                match_method = "direct_url"
+                break
+
+    # Strategy 2: Search fallback
+    if not found_resp:
+        search_url, search_score = try_search(title, year, session, headers, logger)
+        if search_url:
+            # Fetch the actual movie page
+            resp = make_request(
+                search_url, headers=headers,
+                delay=config.RT_DELAY + random.uniform(0, 1.5),
+                session=session, logger=logger,
+            )
+            if resp and resp.status_code == 200:
+                found_resp = resp
+                found_url = search_url
+                match_method = "search"
+
+    # Extract data
+    if found_resp:
+        data = extract_rt_data(found_resp.content)
+        data["bom_release_id"] = release_id
+        data["title_searched"] = title
+        data["rt_url"] = found_url
+        data["match_method"] = match_method
+        if data["tomatometer"] is not None:
+            logger.debug(
+                f"  {title}: TM={data['tomatometer']}%, "
+                f"AS={data['audience_score']}% ({match_method})"
+            )
+    else:
+        data = {
+            "bom_release_id": release_id,
+            "title_searched": title,
+            "rt_url": None,
+            "tomatometer": None,
+            "audience_score": None,
+            "critic_count": None,
+            "audience_count": None,
+            "rt_genres": None,
+            "rt_rating": None,
+            "match_method": "unmatched",
+            "rt_title": None,
+        }
+        logger.debug(f"  {title}: UNMATCHED")
+
+    return data
+
+
 def scrape_rotten_tomatoes():
     """Main function to scrape RT scores for all movies."""
     logger = setup_logging("04_scrape_rotten_tomatoes")
     logger.info("Starting Rotten Tomatoes scrape")
 
     # Load BOM data to get movie list
-    details_path = config.DATA_RAW / "bom_details.csv"
-    index_path = config.DATA_RAW / "bom_index.csv"
+    details_path = checkpoint_path("bom_details")
+    index_path = config.DATA_RAW / "bom_index.parquet"
 
     if details_path.exists():
-        movies_df = pd.read_csv(details_path)
-        logger.info(f"Loaded {len(movies_df)} movies from bom_details.csv")
+        movies_df = read_table(details_path)
+        logger.info(f"Loaded {len(movies_df)} movies from {details_path.name}")
     elif index_path.exists():
-        movies_df = pd.read_csv(index_path)
-        logger.info(f"Loaded {len(movies_df)} movies from bom_index.csv (details not available)")
+        movies_df = read_table(index_path)
+        logger.info(f"Loaded {len(movies_df)} movies from bom_index.parquet (details not available)")
     else:
         logger.error("No BOM data found. Run steps 01 and 02 first.")
         return
 
     # Check for existing checkpoint
-    output_path = config.DATA_RAW / "rt_scores.csv"
+    output_path = checkpoint_path("rt_scores")
     _, processed_ids = load_checkpoint(output_path)
     if processed_ids:
         logger.info(f"Resuming: {len(processed_ids)} already scraped")
 
-    # Use a session for cookie persistence
-    session = requests.Session()
+    todo = movies_df[
+        ~movies_df["bom_release_id"].astype(str).isin(processed_ids)
+    ].reset_index(drop=True)
+    logger.info(f"{len(todo)} movies remaining")
+
+    # Slugs and years for every remaining movie, computed column-wise
+    slugs = construct_base_slugs(todo["title"])
+    if "release_date" in todo.columns:
+        years = release_years(todo["release_date"])
+    else:
+        years = [None] * len(todo)
+    jobs = zip(todo["bom_release_id"].astype(str), todo["title"], slugs, years)
+
+    # One warmed-up session (cookies + pooled connections) shared by the workers
+    session = make_rt_session(logger)
 
     batch = []
     matched = 0
     unmatched = 0
-    ua_index = 0
-
-    for i, row in tqdm(movies_df.iterrows(), total=len(movies_df), desc="Scraping RT"):
-        release_id = str(row["bom_release_id"])
-
-        if release_id in processed_ids:
-            continue
-
-        title = row["title"]
-        # Try to extract year from release date
-        year = None
-        if "release_date" in row and pd.notna(row.get("release_date")):
-            date = parse_date(str(row["release_date"]))
-            if date:
-                year = date.year
-
-        # Rotate user agent periodically
-        headers = get_rt_headers(ua_index)
-        ua_index += 1
-
-        # Strategy 1: Direct URL construction
-        slugs = construct_rt_slugs(title, year)
-        found_resp = None
-        found_url = None
-        match_method = "unmatched"
-
-        for slug in slugs:
-            resp, url = try_direct_url(slug, session, headers, logger)
-            if resp:
-                found_resp = resp
-                found_url = url
-                match_method = "direct_url"
-                break
+    dead_slugs = load_dead_slugs()
+    if dead_slugs:
+        logger.info(f"Skipping {len(dead_slugs)} slugs that 404'd on earlier runs")
+
+    # RT_CONCURRENCY movies are looked up at once, but make_request paces
+    # requests per host across all workers, so RT still sees at most one
+    # request per RT_DELAY; the pool only overlaps latency and parsing.
+    with ThreadPoolExecutor(max_workers=config.RT_CONCURRENCY) as pool:
+        futures = [
+            pool.submit(scrape_movie, release_id, title, slug, year,
+                        ua_index, session, logger, dead_slugs)
+            for ua_index, (release_id, title, slug, year) in enumerate(jobs)
+        ]
+
+        for future in tqdm(as_completed(futures), total=len(futures),
+                           desc="Scraping RT", mininterval=0.5):
+            data = future.result()
+            if data["match_method"] == "unmatched":
+                unmatched += 1
+            else:
+                matched += 1
+            batch.append(data)
 
-        # Strategy 2: Search fallback
-        if not found_resp:
-            search_url, search_score = try_search(title, year, session, headers, logger)
-            if search_url:
-                # Fetch the actual movie page
-                resp = make_request(
-                    search_url, headers=headers,
-                    delay=config.RT_DELAY + random.uniform(0, 1.5),
-                    session=session, logger=logger,
-                )
-                if resp and resp.status_code == 200:
-                    found_resp = resp
-                    found_url = search_url
-                    match_method = "search"
-
-        # Extract data
-        if found_resp:
-            data = extract_rt_data(found_resp.text)
-            data["bom_release_id"] = release_id
-            data["title_searched"] = title
-            data["rt_url"] = found_url
-            data["match_method"] = match_method
-            matched += 1
-            if data["tomatometer"] is not None:
-                logger.debug(
-                    f"  {title}: TM={data['tomatometer']}%, "
-                    f"AS={data['audience_score']}% ({match_method})"
-                )
-        else:
-            data = {
-                "bom_release_id": release_id,
-                "title_searched": title,
-                "rt_url": None,
-                "tomatometer": None,
-                "audience_score": None,
-                "critic_count": None,
-                "audience_count": None,
-                "rt_genres": None,
-                "rt_rating": None,
-                "match_method": "unmatched",
-                "rt_title": None,
-            }
-            unmatched += 1
-            logger.debug(f"  {title}: UNMATCHED")
-
-        batch.append(data)
-
-        # Checkpoint
-        if len(batch) >= config.RT_CHECKPOINT_INTERVAL:
-            save_checkpoint(batch, output_path, logger)
-            processed_ids.update(d["bom_release_id"] for d in batch)
-            batch = []
+            # Checkpoint
+            if len(batch) >= config.RT_CHECKPOINT_INTERVAL:
+                save_checkpoint(batch, output_path, logger)
+                save_dead_slugs(dead_slugs)
+                processed_ids.update(d["bom_release_id"] for d in batch)
+                batch = []
 
     # Save remaining
     if batch:
         save_checkpoint(batch, output_path, logger)
+    save_dead_slugs(dead_slugs)
 
     # Final summary
     total = matched + unmatched
-    logger.info(
-        f"Done. Matched: {matched}/{total} ({100*matched/total:.1f}%). "
-        f"Unmatched: {unmatched}."
-    )
+    if total:
+        logger.info(
+            f"Done. Matched: {matched}/{total} ({100*matched/total:.1f}%). "
+            f"Unmatched: {unmatched}."
+        )
 
 
 if __name__ == "__main__":
@@ -8,26 +8,23 @@ These are movies where the direct URL resolved but RT either:
 Strategy: Try year-appended slugs first, use Referer header,
 and fall back to search.
 
-Input:  data/raw/rt_scores.csv
-Output: Updates data/raw/rt_scores.csv in-place
+Input:  data/raw/rt_scores.parquet
+Output: Updates data/raw/rt_scores.parquet in-place
 """
 
 import json
 import random
 import re
 import sys
-import time
 from pathlib import Path
-from urllib.parse import quote_plus
+from urllib.parse import urlsplit
 
-from bs4 import BeautifulSoup
 import pandas as pd
-import requests
 from tqdm import tqdm
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 import config
-from src.utils import setup_logging, parse_date
+from src.utils import checkpoint_path, pace_host, setup_logging, read_table, write_table
 
 # Import extraction function from main scraper
 from src import utils as _  # noqa ensure path
@@ -36,11 +33,18 @@ scraper_mod = importlib.import_module("src.04_scrape_rotten_tomatoes")
 extract_rt_data = scraper_mod.extract_rt_data
 construct_rt_slugs = scraper_mod.construct_rt_slugs
 try_search = scraper_mod.try_search
+make_rt_session = scraper_mod.make_rt_session
+load_dead_slugs = scraper_mod.load_dead_slugs
+release_years = scraper_mod.release_years
 
 
 def make_browser_request(url, session, headers, logger, delay=2.5):
-    """Make a request that looks more like a real browser."""
-    time.sleep(delay + random.uniform(0.5, 2.0))
+    """Make a request that looks more like a real browser.
+
+    Requests to the same host are spaced `delay` plus 0.5-2s of jitter
+    apart; time already spent since the previous one counts towards it.
+    """
+    pace_host(urlsplit(url).netloc, delay + random.uniform(0.5, 2.0))
 
     h = headers.copy()
     h["Referer"] = "https://www.rottentomatoes.com/"
@@ -70,16 +74,52 @@ def make_browser_request(url, session, headers, logger, delay=2.5):
     return None
 
 
+def fix_record(idx, data, url, match_method):
+    """Row update for a successfully re-scraped movie, keyed by its df index."""
+    return {
+        "idx": idx,
+        "tomatometer": data["tomatometer"],
+        "audience_score": data["audience_score"],
+        "critic_count": data["critic_count"],
+        "audience_count": data["audience_count"],
+        "rt_genres": data["rt_genres"],
+        "rt_rating": data["rt_rating"],
+        "rt_title": data["rt_title"],
+        "rt_url": url,
+        "match_method": match_method,
+    }
+
+
+def apply_fixes(df, updates):
+    """
+    Write all collected fixes into df in one assignment per column.
+
+    Columns are rebuilt whole (via object dtype) rather than set cell by
+    cell, so a fix can put text into a column that was read back from CSV
+    as all-NaN floats.
+    """
+    if not updates:
+        return
+    upd = pd.DataFrame(updates).set_index("idx")
+    for col in upd.columns:
+        merged = df[col].astype(object)
+        merged.loc[upd.index] = upd[col].astype(object)
+        df[col] = merged.infer_objects()
+
+
 def rescrape_missing():
     logger = setup_logging("04b_rescrape_rt_missing")
     logger.info("Starting RT re-scrape for movies with missing scores")
 
-    rt_path = config.DATA_RAW / "rt_scores.csv"
-    df = pd.read_csv(rt_path)
+    rt_path = checkpoint_path("rt_scores")
+    df = read_table(rt_path)
 
-    # Also load BOM details for year info
-    bom = pd.read_csv(config.DATA_RAW / "bom_details.csv")
-    bom_years = dict(zip(bom["bom_release_id"].astype(str), bom["release_date"]))
+    # Also load BOM details for year info, parsed to int years once up front
+    bom = read_table(checkpoint_path("bom_details"))
+    bom_years = dict(zip(
+        bom["bom_release_id"].astype(str),
+        release_years(bom["release_date"]),
+    ))
 
     # Find movies that matched but have no scores
     mask = (
@@ -90,33 +130,24 @@ def rescrape_missing():
     missing = df[mask].copy()
     logger.info(f"Found {len(missing)} movies with matched pages but no scores")
 
-    session = requests.Session()
-    # First visit RT homepage to get cookies
-    homepage_headers = {
-        "User-Agent": config.RT_USER_AGENTS[0],
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-    }
-    try:
-        session.get("https://www.rottentomatoes.com", headers=homepage_headers, timeout=15)
-        time.sleep(2)
-    except Exception:
-        pass
+    # Session already holding RT's cookies from a homepage visit
+    session = make_rt_session(logger)
+    dead_slugs = load_dead_slugs()
 
     fixed = 0
     still_missing = 0
     ua_index = 0
+    updates = []
 
-    for idx, row in tqdm(missing.iterrows(), total=len(missing), desc="Re-scraping RT"):
-        release_id = str(row["bom_release_id"])
-        title = row["title_searched"]
-
-        # Get year from BOM data
-        year = None
-        date_str = bom_years.get(release_id)
-        if date_str and pd.notna(date_str):
-            date = parse_date(str(date_str))
-            if date:
-                year = date.year
+    # String IDs computed column-wise; the loop only needs index, id, title
+    rows = zip(
+        missing.index,
+        missing["bom_release_id"].astype(str),
+        missing["title_searched"],
+    )
+    progress = tqdm(rows, total=len(missing), desc="Re-scraping RT", mininterval=0.5)
+    for idx, release_id, title in progress:
+        year = bom_years.get(release_id)
 
         ua = config.RT_USER_AGENTS[ua_index % len(config.RT_USER_AGENTS)]
         ua_index += 1
@@ -127,25 +158,18 @@ def rescrape_missing():
         # Reorder: year-appended first, then base
         year_slugs = [s for s in slugs if year and str(year) in s]
         base_slugs = [s for s in slugs if not (year and str(year) in s)]
-        ordered_slugs = year_slugs + base_slugs
+        # Slugs step 04 already saw 404 cannot be the movie's page
+        ordered_slugs = [s for s in year_slugs + base_slugs if s not in dead_slugs]
 
         found = False
         for slug in ordered_slugs:
             url = f"https://www.rottentomatoes.com/m/{slug}"
             resp = make_browser_request(url, session, headers, logger)
             if resp and "/m/" in resp.url and "search" not in resp.url:
-                data = extract_rt_data(resp.text)
+                data = extract_rt_data(resp.content)
                 if data["tomatometer"] is not None:
                     # Success - update the row
-                    df.at[idx, "tomatometer"] = data["tomatometer"]
-                    df.at[idx, "audience_score"] = data["audience_score"]
-                    df.at[idx, "critic_count"] = data["critic_count"]
-                    df.at[idx, "audience_count"] = data["audience_count"]
-                    df.at[idx, "rt_genres"] = data["rt_genres"]
-                    df.at[idx, "rt_rating"] = data["rt_rating"]
-                    df.at[idx, "rt_title"] = data["rt_title"]
-                    df.at[idx, "rt_url"] = url
-                    df.at[idx, "match_method"] = "rescrape_direct"
+                    updates.append(fix_record(idx, data, url, "rescrape_direct"))
                     fixed += 1
                     logger.info(f"  FIXED {title}: TM={data['tomatometer']}% AS={data['audience_score']}% via {slug}")
                     found = True
@@ -159,17 +183,9 @@ def rescrape_missing():
         if search_url:
             resp = make_browser_request(search_url, session, headers, logger)
             if resp:
-                data = extract_rt_data(resp.text)
+                data = extract_rt_data(resp.content)
                 if data["tomatometer"] is not None:
-                    df.at[idx, "tomatometer"] = data["tomatometer"]
-                    df.at[idx, "audience_score"] = data["audience_score"]
-                    df.at[idx, "critic_count"] = data["critic_count"]
-                    df.at[idx, "audience_count"] = data["audience_count"]
-                    df.at[idx, "rt_genres"] = data["rt_genres"]
-                    df.at[idx, "rt_rating"] = data["rt_rating"]
-                    df.at[idx, "rt_title"] = data["rt_title"]
-                    df.at[idx, "rt_url"] = search_url
-                    df.at[idx, "match_method"] = "rescrape_search"
+                    updates.append(fix_record(idx, data, search_url, "rescrape_search"))
                     fixed += 1
                     logger.info(f"  FIXED {title}: TM={data['tomatometer']}% AS={data['audience_score']}% via search")
                     found = True
@@ -178,8 +194,9 @@ def rescrape_missing():
             still_missing += 1
             logger.debug(f"  STILL MISSING: {title}")
 
-    # Save updated CSV
-    df.to_csv(rt_path, index=False)
+    # Save updated table
+    apply_fixes(df, updates)
+    write_table(df, rt_path)
     logger.info(f"Done. Fixed: {fixed}/{len(missing)}. Still missing: {still_missing}.")
     logger.info(f"Updated {rt_path}")
 
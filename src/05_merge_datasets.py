@@ -1,16 +1,15 @@
 """
-Step 5: Merge all scraped datasets into a single analysis-ready CSV.
+Step 5: Merge all scraped datasets into a single analysis-ready Parquet table.
 
 Joins BOM index + details (exact), BOM + RT scores (exact), and
 BOM + The Numbers budgets (fuzzy title match). Applies study filters
 and constructs RDD variables.
 
-Input:  data/raw/bom_index.csv, bom_details.csv, rt_scores.csv, the_numbers_budgets.csv
-Output: data/processed/merged_dataset.csv, data/processed/match_diagnostics.csv
+Input:  data/raw/bom_index.parquet, bom_details.parquet, rt_scores.parquet, the_numbers_budgets.parquet
+Output: data/processed/merged_dataset.parquet, data/processed/match_diagnostics.csv
 """
 
 import sys
-from datetime import date, timedelta
 from pathlib import Path
 
 import numpy as np
@@ -19,38 +18,76 @@ from rapidfuzz import fuzz, process
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 import config
-from src.utils import normalize_title, parse_date, setup_logging
+from src.utils import (
+    checkpoint_path, normalize_title_series, parse_date_series, read_table, setup_logging,
+    write_table,
+)
+
+
+# Columns each raw table contributes to the merge; nothing else is read
+BOM_INDEX_COLS = [
+    "bom_release_id", "title", "total_gross", "max_theaters",
+    "release_date_raw", "bom_year", "distributor", "release_url",
+]
+BOM_DETAIL_COLS = [
+    "bom_release_id", "opening_wknd_gross", "opening_wknd_theaters",
+    "widest_release", "domestic_gross", "mpaa_rating", "genres",
+    "release_date", "distributor",
+]
+RT_COLS = [
+    "bom_release_id", "tomatometer", "audience_score",
+    "critic_count", "audience_count", "rt_genres", "rt_rating",
+    "match_method", "rt_url", "rt_title",
+]
+TN_COLS = [
+    "title", "title_normalized", "release_year",
+    "production_budget", "domestic_gross",
+]
 
 
 def load_raw_data(logger):
-    """Load all four raw CSV files."""
-    bom_index = pd.read_csv(config.DATA_RAW / "bom_index.csv")
+    """Load all four raw data files, reading only the merged columns."""
+    bom_index = read_table(config.DATA_RAW / "bom_index.parquet", columns=BOM_INDEX_COLS)
     logger.info(f"BOM index: {len(bom_index)} rows")
 
-    bom_details = pd.read_csv(config.DATA_RAW / "bom_details.csv")
+    bom_details = read_table(checkpoint_path("bom_details"), columns=BOM_DETAIL_COLS)
     logger.info(f"BOM details: {len(bom_details)} rows")
 
-    rt_scores = pd.read_csv(config.DATA_RAW / "rt_scores.csv")
+    rt_scores = read_table(checkpoint_path("rt_scores"), columns=RT_COLS)
     logger.info(f"RT scores: {len(rt_scores)} rows")
 
-    tn_budgets = pd.read_csv(config.DATA_RAW / "the_numbers_budgets.csv")
+    tn_budgets = read_table(config.DATA_RAW / "the_numbers_budgets.parquet", columns=TN_COLS)
     logger.info(f"The Numbers budgets: {len(tn_budgets)} rows")
 
     return bom_index, bom_details, rt_scores, tn_budgets
 
 
+def encode_release_ids(*frames):
+    """
+    Convert bom_release_id in each frame to a Categorical over one shared set
+    of categories, so the joins hash compact integer codes instead of strings.
+    """
+    ids = pd.concat([df["bom_release_id"] for df in frames]).dropna().unique()
+    categories = pd.Index(ids)
+    for df in frames:
+        df["bom_release_id"] = pd.Categorical(df["bom_release_id"], categories=categories)
+
+
 def merge_bom(bom_index, bom_details, logger):
     """Merge BOM index and details on bom_release_id."""
-    # Use details as the primary source; supplement with index data
+    # Use details as the primary source; supplement with index data.
+    # A resumed scrape can leave a release in the checkpoint twice; keep the
+    # latest row so the join stays one-to-one (validate= fails loudly if not).
+    details = bom_details[BOM_DETAIL_COLS].drop_duplicates(
+        subset="bom_release_id", keep="last"
+    )
     bom = pd.merge(
-        bom_index[["bom_release_id", "title", "total_gross", "max_theaters",
-                    "release_date_raw", "bom_year", "distributor", "release_url"]],
-        bom_details[["bom_release_id", "opening_wknd_gross", "opening_wknd_theaters",
-                      "widest_release", "domestic_gross", "mpaa_rating", "genres",
-                      "release_date", "distributor"]],
+        bom_index[BOM_INDEX_COLS],
+        details,
         on="bom_release_id",
         how="left",
         suffixes=("_index", "_detail"),
+        validate="one_to_one",
     )
 
     # Prefer detail-level data, fall back to index
@@ -58,23 +95,13 @@ def merge_bom(bom_index, bom_details, logger):
     bom["domestic_gross"] = bom["domestic_gross"].fillna(bom["total_gross"])
     bom["distributor"] = bom["distributor_detail"].fillna(bom["distributor_index"])
 
-    # Parse release date — prefer detailed, fall back to index raw
-    def resolve_release_date(row):
-        # Try detailed release date first
-        if pd.notna(row.get("release_date")):
-            d = parse_date(str(row["release_date"]))
-            if d:
-                return d
-        # Fall back to index raw date + year
-        if pd.notna(row.get("release_date_raw")) and pd.notna(row.get("bom_year")):
-            raw = str(row["release_date_raw"]).strip()
-            year = int(row["bom_year"])
-            d = parse_date(f"{raw}, {year}")
-            if d:
-                return d
-        return None
-
-    bom["release_date_parsed"] = bom.apply(resolve_release_date, axis=1)
+    # Parse release date — prefer detailed, fall back to index raw + year.
+    # Both columns are parsed whole rather than row by row.
+    detail_date = parse_date_series(bom["release_date"])
+    raw = (bom["release_date_raw"].astype("string").str.strip()
+           + ", " + bom["bom_year"].astype("Int64").astype("string"))
+    index_date = parse_date_series(raw)
+    bom["release_date_parsed"] = detail_date.combine_first(index_date)
 
     # Clean up columns
     bom = bom.rename(columns={"mpaa_rating": "mpaa_rating"})
@@ -91,14 +118,11 @@ def merge_bom(bom_index, bom_details, logger):
 
 def merge_rt(bom, rt_scores, logger):
     """Merge RT scores onto BOM data via bom_release_id."""
-    rt_cols = [
-        "bom_release_id", "tomatometer", "audience_score",
-        "critic_count", "audience_count", "rt_genres", "rt_rating",
-        "match_method", "rt_url", "rt_title",
-    ]
-    rt_subset = rt_scores[[c for c in rt_cols if c in rt_scores.columns]]
+    rt_subset = rt_scores[[c for c in RT_COLS if c in rt_scores.columns]]
+    rt_subset = rt_subset.drop_duplicates(subset="bom_release_id", keep="last")
 
-    merged = pd.merge(bom, rt_subset, on="bom_release_id", how="left")
+    merged = pd.merge(bom, rt_subset, on="bom_release_id", how="left",
+                      validate="one_to_one")
 
     # Fill MPAA rating from RT if missing from BOM
     if "rt_rating" in merged.columns:
@@ -119,100 +143,91 @@ def fuzzy_match_budgets(bom_df, tn_df, logger):
     """
     # Pre-normalize BOM titles
     bom_df = bom_df.copy()
-    bom_df["title_norm"] = bom_df["title"].apply(normalize_title)
+    bom_df["title_norm"] = normalize_title_series(bom_df["title"])
 
     # Extract release year from parsed date
-    bom_df["release_year"] = bom_df["release_date_parsed"].apply(
-        lambda d: d.year if d else None
-    )
+    bom_df["release_year"] = bom_df["release_date_parsed"].dt.year
 
     # Ensure TN has normalized titles and years
     tn_df = tn_df.copy()
     if "title_normalized" not in tn_df.columns:
-        tn_df["title_normalized"] = tn_df["title"].apply(normalize_title)
+        tn_df["title_normalized"] = normalize_title_series(tn_df["title"])
     if "release_year" not in tn_df.columns:
         tn_df["release_year"] = pd.to_numeric(tn_df["release_year"], errors="coerce")
 
-    # Build match results
-    match_results = []
-
-    for idx, bom_row in bom_df.iterrows():
-        bom_title = bom_row["title_norm"]
-        bom_year = bom_row["release_year"]
-
-        if not bom_title:
-            match_results.append({
-                "idx": idx,
-                "tn_title_matched": None,
-                "tn_match_score": 0,
-                "production_budget": None,
-                "tn_domestic_gross": None,
-                "tn_match_status": "unmatched",
-            })
-            continue
-
+    # Score each block of BOM titles sharing a release year against all TN
+    # titles within ±1 year in one cdist call. Candidates keep tn_df order,
+    # so argmax breaks ties the same way extractOne would.
+    tn_titles = tn_df["title_normalized"].fillna("").to_numpy()
+    best_pos = np.full(len(bom_df), -1)
+    best_score = np.zeros(len(bom_df))
+
+    # Most titles have an identical normalized TN title from the same year;
+    # resolve those with a dict probe and leave only the rest for fuzzy
+    # scoring. The first TN row wins when a (title, year) pair repeats.
+    exact = {}
+    for pos, key in enumerate(zip(tn_titles, tn_df["release_year"])):
+        if key[0] and pd.notna(key[1]):
+            exact.setdefault(key, pos)
+    has_title = bom_df["title_norm"].astype(bool).to_numpy()
+    exact_pos = np.array([
+        exact.get(key, -1) if pd.notna(key[1]) else -1
+        for key in zip(bom_df["title_norm"], bom_df["release_year"])
+    ], dtype=int)
+    is_exact = has_title & (exact_pos >= 0)
+    best_pos[is_exact] = exact_pos[is_exact]
+    best_score[is_exact] = 100.0
+    logger.info(f"Budget matching: {is_exact.sum()} exact title/year hits")
+
+    to_score = has_title & ~is_exact
+    blocks = bom_df.assign(_row=np.arange(len(bom_df)))[to_score].groupby(
+        "release_year", dropna=False
+    )
+    for bom_year, block in blocks:
         # Year blocking: consider only TN movies within ±1 year
-        if bom_year and pd.notna(bom_year):
-            year_mask = tn_df["release_year"].between(bom_year - 1, bom_year + 1)
-            candidates = tn_df[year_mask]
+        if pd.notna(bom_year):
+            cand_pos = np.flatnonzero(
+                tn_df["release_year"].between(bom_year - 1, bom_year + 1).to_numpy()
+            )
         else:
-            candidates = tn_df
-
-        if candidates.empty:
-            match_results.append({
-                "idx": idx,
-                "tn_title_matched": None,
-                "tn_match_score": 0,
-                "production_budget": None,
-                "tn_domestic_gross": None,
-                "tn_match_status": "unmatched",
-            })
+            cand_pos = np.arange(len(tn_df))
+        if len(cand_pos) == 0:
             continue
 
-        # Find best match using token_sort_ratio
-        result = process.extractOne(
-            bom_title,
-            candidates["title_normalized"].tolist(),
+        # No score_cutoff: below-threshold rows are still "unmatched", but
+        # they keep their real best score and that candidate's budget, which
+        # feeds the log_budget control
+        scores = process.cdist(
+            block["title_norm"].tolist(),
+            tn_titles[cand_pos].tolist(),
             scorer=fuzz.token_sort_ratio,
-            score_cutoff=0,
+            dtype=np.float64,
+            workers=-1,
         )
-
-        if result is None:
-            match_results.append({
-                "idx": idx,
-                "tn_title_matched": None,
-                "tn_match_score": 0,
-                "production_budget": None,
-                "tn_domestic_gross": None,
-                "tn_match_status": "unmatched",
-            })
-            continue
-
-        matched_title_norm, score, match_idx = result
-        tn_row = candidates.iloc[match_idx]
-
-        if score >= config.FUZZY_MATCH_ACCEPT_THRESHOLD:
-            status = "matched"
-        elif score >= config.FUZZY_MATCH_REVIEW_THRESHOLD:
-            status = "review"
-        else:
-            status = "unmatched"
-
-        match_results.append({
-            "idx": idx,
-            "tn_title_matched": tn_row["title"],
-            "tn_match_score": score,
-            "production_budget": tn_row.get("production_budget"),
-            "tn_domestic_gross": tn_row.get("domestic_gross"),
-            "tn_match_status": status,
-        })
-
-    match_df = pd.DataFrame(match_results).set_index("idx")
-
-    # Join match results back to BOM data
-    for col in ["tn_title_matched", "tn_match_score", "production_budget",
-                "tn_domestic_gross", "tn_match_status"]:
-        bom_df[col] = match_df[col]
+        best = scores.argmax(axis=1)
+        rows = block["_row"].to_numpy()
+        best_pos[rows] = cand_pos[best]
+        best_score[rows] = scores[np.arange(len(rows)), best]
+
+    # Join match results back to BOM data: gather the matched TN values into
+    # preallocated full-length arrays, left empty where nothing matched
+    found = best_pos >= 0
+    hits = best_pos[found]
+    matched_title = np.full(len(bom_df), None, dtype=object)
+    matched_title[found] = tn_df["title"].to_numpy()[hits]
+    bom_df["tn_title_matched"] = matched_title
+    bom_df["tn_match_score"] = best_score
+    for tn_col, col in [("production_budget", "production_budget"),
+                        ("domestic_gross", "tn_domestic_gross")]:
+        values = np.full(len(bom_df), np.nan)
+        values[found] = tn_df[tn_col].to_numpy(dtype=np.float64, na_value=np.nan)[hits]
+        bom_df[col] = values
+    bom_df["tn_match_status"] = np.select(
+        [best_score >= config.FUZZY_MATCH_ACCEPT_THRESHOLD,
+         best_score >= config.FUZZY_MATCH_REVIEW_THRESHOLD],
+        ["matched", "review"],
+        default="unmatched",
+    )
 
     n_matched = (bom_df["tn_match_status"] == "matched").sum()
     n_review = (bom_df["tn_match_status"] == "review").sum()
@@ -230,11 +245,9 @@ def apply_study_filters(df, logger):
     before = len(df)
 
     # Date filter
-    start = date.fromisoformat(config.START_DATE)
-    end = date.fromisoformat(config.END_DATE)
-    df = df[df["release_date_parsed"].apply(
-        lambda d: d is not None and start <= d <= end
-    )]
+    start = pd.Timestamp(config.START_DATE)
+    end = pd.Timestamp(config.END_DATE)
+    df = df[df["release_date_parsed"].between(start, end)]
     logger.info(f"After date filter ({config.START_DATE} to {config.END_DATE}): {len(df)} rows (removed {before - len(df)})")
 
     # Wide release filter
@@ -245,6 +258,13 @@ def apply_study_filters(df, logger):
     return df
 
 
+def log_at_least_one(values):
+    """log(max(x, 1)) as a float64 array in one pass; NaN stays NaN."""
+    if isinstance(values, pd.Series):
+        values = values.to_numpy(dtype=np.float64, na_value=np.nan)
+    return np.log(np.maximum(values, 1.0))
+
+
 def construct_rdd_variables(df, logger):
     """Create all derived variables needed for the RD analysis."""
     # RDD running variables (centered at threshold)
@@ -256,26 +276,30 @@ def construct_rdd_variables(df, logger):
     df["is_fresh_audience"] = (df["audience_score"] >= config.RD_THRESHOLD).astype("Int64")
 
     # Log-transformed outcome variables
-    df["log_opening_gross"] = np.log(df["opening_wknd_gross"].clip(lower=1).astype(float))
-    df["log_total_gross"] = np.log(df["domestic_gross"].clip(lower=1).astype(float))
+    df["log_opening_gross"] = log_at_least_one(df["opening_wknd_gross"])
+    df["log_total_gross"] = log_at_least_one(df["domestic_gross"])
 
     # Log-transformed control variables
-    df["log_theaters"] = np.log(df["opening_wknd_theaters"].clip(lower=1).astype(float))
-    df["log_budget"] = np.where(
-        df["production_budget"].notna() & (df["production_budget"] > 0),
-        np.log(df["production_budget"].clip(lower=1).astype(float)),
-        np.nan,
-    )
+    df["log_theaters"] = log_at_least_one(df["opening_wknd_theaters"])
+    budget = df["production_budget"].to_numpy(dtype=np.float64, na_value=np.nan)
+    df["log_budget"] = np.where(budget > 0, log_at_least_one(budget), np.nan)
 
     # Calendar variables
-    df["release_year"] = df["release_date_parsed"].apply(lambda d: d.year if d else None)
-    df["release_month"] = df["release_date_parsed"].apply(lambda d: d.month if d else None)
+    release_date = df["release_date_parsed"]
+    df["release_year"] = release_date.dt.year.astype("Int64")
+    df["release_month"] = release_date.dt.month.astype("Int64")
 
     # In-theaters flag
-    cutoff = date.fromisoformat(config.END_DATE) - timedelta(days=config.IN_THEATERS_WINDOW_DAYS)
-    df["in_theaters"] = df["release_date_parsed"].apply(
-        lambda d: d is not None and d >= cutoff
-    )
+    cutoff = pd.Timestamp(config.END_DATE) - pd.Timedelta(days=config.IN_THEATERS_WINDOW_DAYS)
+    df["in_theaters"] = release_date >= cutoff
+
+    # Control dummies, stored with the dataset so the analysis reads them
+    # as-is. MPAA: drop G as reference (fewest obs); year: drop earliest.
+    mpaa_dummies = pd.get_dummies(df["mpaa_rating"], prefix="mpaa", dtype=np.int8)
+    mpaa_dummies = mpaa_dummies.drop(columns=["mpaa_G"], errors="ignore")
+    year_dummies = pd.get_dummies(df["release_year"], prefix="year", drop_first=True,
+                                  dtype=np.int8)
+    df = pd.concat([df, mpaa_dummies, year_dummies], axis=1)
 
     logger.info(f"Constructed RDD variables. {df['is_fresh_critic'].notna().sum()} have critic treatment, "
                 f"{df['is_fresh_audience'].notna().sum()} have audience treatment.")
@@ -312,6 +336,7 @@ def merge_datasets():
 
     # Load raw data
     bom_index, bom_details, rt_scores, tn_budgets = load_raw_data(logger)
+    encode_release_ids(bom_index, bom_details, rt_scores)
 
     # Step A: Merge BOM index + details
     bom = merge_bom(bom_index, bom_details, logger)
@@ -328,10 +353,8 @@ def merge_datasets():
     # Step E: Construct RDD variables
     final = construct_rdd_variables(filtered, logger)
 
-    # Convert release_date_parsed to string for CSV
-    final["release_date"] = final["release_date_parsed"].apply(
-        lambda d: str(d) if d else None
-    )
+    # Parquet keeps the datetime64 column as-is
+    final["release_date"] = final["release_date_parsed"]
 
     # Select final columns
     output_cols = [
@@ -346,12 +369,16 @@ def merge_datasets():
         "in_theaters",
         "match_method", "tn_match_score", "tn_match_status",
     ]
+    output_cols += [c for c in final.columns
+                    if c.startswith(("mpaa_", "year_")) and c != "mpaa_rating"]
     final_out = final[[c for c in output_cols if c in final.columns]]
+    # The categorical id encoding was only for the joins
+    final_out = final_out.astype({"bom_release_id": "str"})
 
     # Save
-    output_path = config.DATA_PROCESSED / "merged_dataset.csv"
+    output_path = config.DATA_PROCESSED / "merged_dataset.parquet"
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    final_out.to_csv(output_path, index=False)
+    write_table(final_out, output_path)
     logger.info(f"Saved {len(final_out)} movies to {output_path}")
 
     # Create diagnostics
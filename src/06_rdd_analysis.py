@@ -13,12 +13,13 @@ Output: formatted results tables printed to console and saved to output/rdd_resu
 
 import sys
 import warnings
+from concurrent.futures import ProcessPoolExecutor
 from io import StringIO
 from pathlib import Path
+from statistics import NormalDist
 
 import numpy as np
 import pandas as pd
-import statsmodels.api as sm
 from rdrobust import rdrobust
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -30,18 +31,26 @@ warnings.filterwarnings("ignore", category=RuntimeWarning)
 
 # ── Data loading ──────────────────────────────────────────────────────────────
 
-def load_data():
-    """Load merged dataset and prepare samples."""
-    df = pd.read_csv(config.DATA_PROCESSED / "merged_dataset.csv")
+# Columns fed to the regressions: running variables, treatments, outcomes
+# and continuous controls
+REGRESSION_COLS = [
+    "tomatometer_centered", "audience_score_centered",
+    "is_fresh_critic", "is_fresh_audience",
+    "log_opening_gross", "log_total_gross",
+    "log_budget", "log_theaters",
+]
 
-    # MPAA dummies (drop G as reference — fewest obs)
-    mpaa_dummies = pd.get_dummies(df["mpaa_rating"], prefix="mpaa", drop_first=False)
-    mpaa_dummies = mpaa_dummies.drop(columns=["mpaa_G"], errors="ignore")
 
-    # Year dummies (drop earliest year as reference)
-    year_dummies = pd.get_dummies(df["release_year"], prefix="year", drop_first=True)
+def load_data():
+    """
+    Load merged dataset and prepare samples.
 
-    df = pd.concat([df, mpaa_dummies, year_dummies], axis=1)
+    The MPAA and year control dummies (int8) come precomputed from step 5.
+    """
+    df = pd.read_parquet(config.DATA_PROCESSED / "merged_dataset.parquet", engine="pyarrow")
+    # Cast once here so every per-spec to_numpy(float64) below (and rdrobust's
+    # asarray) is a plain view/gather rather than a dtype conversion
+    df[REGRESSION_COLS] = df[REGRESSION_COLS].astype(np.float64)
 
     return df
 
@@ -59,13 +68,13 @@ def get_control_cols(df):
 
 def run_rdrobust(y, x, covs=None):
     """Run rdrobust and return a results dict."""
-    y_arr = y.values.astype(float)
-    x_arr = x.values.astype(float)
+    y_arr = np.asarray(y, dtype=float)
+    x_arr = np.asarray(x, dtype=float)
 
     kwargs = dict(c=0, kernel="tri", bwselect="mserd")
 
     if covs is not None:
-        covs_arr = covs.values.astype(float)
+        covs_arr = np.asarray(covs, dtype=float)
         kwargs["covs"] = covs_arr
 
     try:
@@ -93,58 +102,119 @@ def run_rdrobust(y, x, covs=None):
 
 # ── Parametric OLS RDD ───────────────────────────────────────────────────────
 
+_NORMAL = NormalDist()
+_Z_975 = _NORMAL.inv_cdf(0.975)
+
+
+def ols_hc1(y, X):
+    """
+    OLS coefficients with HC1 robust covariance, plus R².
+
+    Mirrors statsmodels' OLS(...).fit(cov_type="HC1"): coefficients come
+    from the pseudo-inverse (so a rank-deficient block of all-zero dummies
+    is tolerated), residual df uses the matrix rank, and the sandwich is
+    pinv(X) diag(n/(n-k) e²) pinv(X)ᵀ. X must include the constant column.
+    """
+    pinv = np.linalg.pinv(X)
+    beta = pinv @ y
+    resid = y - X @ beta
+    n = len(y)
+    scale = resid ** 2 * (n / (n - np.linalg.matrix_rank(X)))
+    cov = (pinv * scale) @ pinv.T
+    ssr = resid @ resid
+    centered = y - y.mean()
+    r2 = 1.0 - ssr / (centered @ centered)
+    return beta, cov, r2
+
+
 def run_ols_rdd(y, x, treatment, order=1, covs=None):
     """
     Run parametric RDD via OLS.
 
     Y = α + τ D + β₁ X + β₂ (D×X) [+ β₃ X² + β₄ (D×X²)] [+ Z γ] + ε
 
-    Returns dict with τ estimate, SE, p-value, CI.
+    Takes float64 arrays (covs as a 2-D array, one column per control) and
+    builds the design matrix directly, so the 12 OLS specs skip DataFrame
+    construction. Inference on τ uses the normal distribution, as
+    statsmodels does for robust covariances. Returns dict with τ estimate,
+    SE, p-value, CI.
     """
-    data = pd.DataFrame({"y": y.values, "x": x.values, "D": treatment.values})
-
-    # Polynomial terms interacted with treatment
-    regressors = ["D", "x", "Dx"]
-    data["Dx"] = data["D"] * data["x"]
-
+    # Polynomial terms interacted with treatment; τ is column 1
+    columns = [np.ones_like(x), treatment, x, treatment * x]
     if order >= 2:
-        data["x2"] = data["x"] ** 2
-        data["Dx2"] = data["D"] * data["x2"]
-        regressors += ["x2", "Dx2"]
-
+        x2 = x * x
+        columns += [x2, treatment * x2]
     if covs is not None:
-        covs_reset = covs.reset_index(drop=True)
-        for col in covs_reset.columns:
-            data[col] = pd.to_numeric(covs_reset[col], errors="coerce")
-            regressors.append(col)
-
-    data = data.dropna()
-
-    X = sm.add_constant(data[regressors].astype(float))
-    model = sm.OLS(data["y"], X).fit(cov_type="HC1")
+        columns.append(covs)
+    X = np.column_stack(columns)
 
-    tau = model.params["D"]
-    se = model.bse["D"]
-    pv = model.pvalues["D"]
-    ci = model.conf_int().loc["D"]
+    beta, cov, r2 = ols_hc1(y, X)
+    tau = beta[1]
+    se = np.sqrt(cov[1, 1])
+    pv = 2 * _NORMAL.cdf(-abs(tau / se))
 
     return {
         "coef": tau,
         "se": se,
         "pv": pv,
-        "ci_lower": ci.iloc[0],
-        "ci_upper": ci.iloc[1],
-        "N": int(model.nobs),
-        "r2": model.rsquared,
+        "ci_lower": tau - _Z_975 * se,
+        "ci_upper": tau + _Z_975 * se,
+        "N": len(y),
+        "r2": r2,
     }
 
 
 # ── Run all specifications ────────────────────────────────────────────────────
 
+# (method label, OLS polynomial order); rdrobust picks its own local fit
+METHODS = [("rdrobust", None), ("OLS Linear", 1), ("OLS Quadratic", 2)]
+
+
+def run_spec(method, order, y, x, d, covs, n):
+    """Run one specification and return its result columns."""
+    if method == "rdrobust":
+        rd = run_rdrobust(y, x, covs=covs)
+        return {
+            "Coef": rd.get("coef_robust") or rd.get("coef_conv"),
+            "SE": rd.get("se_robust") or rd.get("se_conv"),
+            "p-value": rd.get("pv_robust") or rd.get("pv_conv"),
+            "CI Lower": rd.get("ci_lower"),
+            "CI Upper": rd.get("ci_upper"),
+            "BW": rd.get("bw_h"),
+            "N (eff)": rd.get("N_total"),
+            "N": n,
+            "Error": rd.get("error"),
+        }
+
+    ols = run_ols_rdd(y, x, d, order=order, covs=covs)
+    return {
+        "Coef": ols["coef"],
+        "SE": ols["se"],
+        "p-value": ols["pv"],
+        "CI Lower": ols["ci_lower"],
+        "CI Upper": ols["ci_upper"],
+        "N": ols["N"],
+        "R²": ols["r2"],
+    }
+
+
 def run_all(df):
-    """Run all 24 regressions and collect results."""
+    """
+    Run all 24 regressions and collect results.
+
+    The specs share no state, so they are fitted in a process pool; results
+    keep the usual Score/Outcome/Method/Controls order.
+    """
     control_cols = get_control_cols(df)
-    results = []
+    # Every regression input as a float64 array, extracted once; each
+    # (score, outcome) sample is then a single boolean mask over them rather
+    # than a chain of DataFrame dropna/filter copies. The controls form one
+    # contiguous block (dummies included).
+    columns = {col: df[col].to_numpy(dtype=np.float64) for col in REGRESSION_COLS}
+    control_mat = np.ascontiguousarray(df[control_cols].to_numpy(dtype=np.float64))
+    released = (df["in_theaters"] == False).to_numpy()
+    labels = []
+    tasks = []
 
     specs = [
         ("Critic",   "tomatometer_centered", "is_fresh_critic",   "tomatometer"),
@@ -160,126 +230,37 @@ def run_all(df):
         for outcome_var, outcome_label, exclude_in_theaters in outcomes:
 
             # Build sample
-            sample = df.dropna(subset=[running_var, treatment_var, outcome_var])
+            y_all = columns[outcome_var]
+            x_all = columns[running_var]
+            d_all = columns[treatment_var]
+            mask = ~np.isnan(y_all) & ~np.isnan(x_all) & ~np.isnan(d_all)
             if exclude_in_theaters:
-                sample = sample[sample["in_theaters"] == False]
-
-            y = sample[outcome_var]
-            x = sample[running_var]
-            d = sample[treatment_var]
-            covs_df = sample[control_cols].dropna(axis=1)
-            # Align covs with sample (drop rows with NaN in any control)
-            valid_mask = covs_df.notna().all(axis=1)
-            sample_ctrl = sample[valid_mask]
-            y_ctrl = sample_ctrl[outcome_var]
-            x_ctrl = sample_ctrl[running_var]
-            d_ctrl = sample_ctrl[treatment_var]
-            covs_clean = covs_df[valid_mask]
-
-            n_sample = len(sample)
-            n_ctrl = len(sample_ctrl)
-
-            # ── rdrobust, no controls ──
-            rd = run_rdrobust(y, x)
-            results.append({
-                "Score": score_label,
-                "Outcome": outcome_label,
-                "Method": "rdrobust",
-                "Controls": "No",
-                "Coef": rd.get("coef_robust") or rd.get("coef_conv"),
-                "SE": rd.get("se_robust") or rd.get("se_conv"),
-                "p-value": rd.get("pv_robust") or rd.get("pv_conv"),
-                "CI Lower": rd.get("ci_lower"),
-                "CI Upper": rd.get("ci_upper"),
-                "BW": rd.get("bw_h"),
-                "N (eff)": rd.get("N_total"),
-                "N": n_sample,
-                "Error": rd.get("error"),
-            })
-
-            # ── rdrobust, with controls ──
-            rd_c = run_rdrobust(y_ctrl, x_ctrl, covs=covs_clean)
-            results.append({
-                "Score": score_label,
-                "Outcome": outcome_label,
-                "Method": "rdrobust",
-                "Controls": "Yes",
-                "Coef": rd_c.get("coef_robust") or rd_c.get("coef_conv"),
-                "SE": rd_c.get("se_robust") or rd_c.get("se_conv"),
-                "p-value": rd_c.get("pv_robust") or rd_c.get("pv_conv"),
-                "CI Lower": rd_c.get("ci_lower"),
-                "CI Upper": rd_c.get("ci_upper"),
-                "BW": rd_c.get("bw_h"),
-                "N (eff)": rd_c.get("N_total"),
-                "N": n_ctrl,
-                "Error": rd_c.get("error"),
-            })
-
-            # ── OLS linear, no controls ──
-            ols_l = run_ols_rdd(y, x, d, order=1)
-            results.append({
-                "Score": score_label,
-                "Outcome": outcome_label,
-                "Method": "OLS Linear",
-                "Controls": "No",
-                "Coef": ols_l["coef"],
-                "SE": ols_l["se"],
-                "p-value": ols_l["pv"],
-                "CI Lower": ols_l["ci_lower"],
-                "CI Upper": ols_l["ci_upper"],
-                "N": ols_l["N"],
-                "R²": ols_l["r2"],
-            })
-
-            # ── OLS linear, with controls ──
-            ols_lc = run_ols_rdd(y_ctrl, x_ctrl, d_ctrl, order=1, covs=covs_clean)
-            results.append({
-                "Score": score_label,
-                "Outcome": outcome_label,
-                "Method": "OLS Linear",
-                "Controls": "Yes",
-                "Coef": ols_lc["coef"],
-                "SE": ols_lc["se"],
-                "p-value": ols_lc["pv"],
-                "CI Lower": ols_lc["ci_lower"],
-                "CI Upper": ols_lc["ci_upper"],
-                "N": ols_lc["N"],
-                "R²": ols_lc["r2"],
-            })
-
-            # ── OLS quadratic, no controls ──
-            ols_q = run_ols_rdd(y, x, d, order=2)
-            results.append({
-                "Score": score_label,
-                "Outcome": outcome_label,
-                "Method": "OLS Quadratic",
-                "Controls": "No",
-                "Coef": ols_q["coef"],
-                "SE": ols_q["se"],
-                "p-value": ols_q["pv"],
-                "CI Lower": ols_q["ci_lower"],
-                "CI Upper": ols_q["ci_upper"],
-                "N": ols_q["N"],
-                "R²": ols_q["r2"],
-            })
-
-            # ── OLS quadratic, with controls ──
-            ols_qc = run_ols_rdd(y_ctrl, x_ctrl, d_ctrl, order=2, covs=covs_clean)
-            results.append({
-                "Score": score_label,
-                "Outcome": outcome_label,
-                "Method": "OLS Quadratic",
-                "Controls": "Yes",
-                "Coef": ols_qc["coef"],
-                "SE": ols_qc["se"],
-                "p-value": ols_qc["pv"],
-                "CI Lower": ols_qc["ci_lower"],
-                "CI Upper": ols_qc["ci_upper"],
-                "N": ols_qc["N"],
-                "R²": ols_qc["r2"],
-            })
-
-    return pd.DataFrame(results)
+                mask &= released
+
+            y, x, d = y_all[mask], x_all[mask], d_all[mask]
+            # Controls with any missing value in this sample are dropped, so
+            # every sample row has complete controls and the controlled specs
+            # reuse the same y/x/d arrays
+            covs = control_mat[mask]
+            covs = covs[:, ~np.isnan(covs).any(axis=0)]
+
+            no_controls = (y, x, d, None, len(y))
+            with_controls = (y, x, d, covs, len(y))
+
+            for method, order in METHODS:
+                for controls, args in (("No", no_controls), ("Yes", with_controls)):
+                    labels.append({
+                        "Score": score_label,
+                        "Outcome": outcome_label,
+                        "Method": method,
+                        "Controls": controls,
+                    })
+                    tasks.append((method, order, *args))
+
+    with ProcessPoolExecutor() as pool:
+        rows = list(pool.map(run_spec, *zip(*tasks)))
+
+    return pd.DataFrame([{**label, **row} for label, row in zip(labels, rows)])
 
 
 # ── Formatting & output ──────────────────────────────────────────────────────
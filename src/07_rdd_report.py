@@ -9,9 +9,13 @@ Output: output/rdd_report.html
 """
 
 import base64
+import os
+import shutil
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
 from pathlib import Path
+from string import Template
 
 import matplotlib
 matplotlib.use("Agg")
@@ -23,27 +27,60 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 import config
 
 
-# ── Plot helpers ──────────────────────────────────────────────────────────────
+# Merged-dataset columns the plots read; the rest are never loaded
+PLOT_COLS = [
+    "tomatometer", "audience_score",
+    "tomatometer_centered", "audience_score_centered",
+    "log_opening_gross", "log_total_gross", "in_theaters",
+]
 
-def fig_to_base64(fig, dpi=150):
-    buf = BytesIO()
-    fig.savefig(buf, format="png", dpi=dpi, bbox_inches="tight", facecolor="white")
-    plt.close(fig)
-    buf.seek(0)
-    return base64.b64encode(buf.read()).decode("utf-8")
 
+# ── Plot helpers ──────────────────────────────────────────────────────────────
 
-def plot_density(df, col, label, threshold=60):
-    """Histogram of scores around the cutoff."""
-    scores = df[col].dropna()
-    fig, ax = plt.subplots(figsize=(5.5, 3.5))
+_MIME_TYPES = {"svg": "image/svg+xml", "png": "image/png", "webp": "image/webp"}
 
-    bins = np.arange(scores.min() - 0.5, scores.max() + 1.5, 1)
-    colors = np.where(bins[:-1] >= threshold, "#4a90d9", "#d94a4a")
 
-    n, _, patches = ax.hist(scores, bins=bins, edgecolor="white", linewidth=0.5)
-    for patch, color in zip(patches, colors):
-        patch.set_facecolor(color)
+def fig_to_data_uri(fig, dpi=None, fmt=None):
+    """
+    Encode a figure as a base64 data: URI for an <img src>.
+
+    `dpi` and `fmt` default to config.REPORT_IMAGE_DPI and
+    config.REPORT_IMAGE_FORMAT. At 96 dpi the figures render at about the
+    width the page displays them, so no pixels are encoded only to be
+    scaled away by the browser. WebP is re-encoded from
+    the PNG render with Pillow and comes out at roughly half the PNG size;
+    SVG is also available, though the 101-bar density plots make it larger
+    than PNG.
+    """
+    dpi = dpi or config.REPORT_IMAGE_DPI
+    fmt = fmt or config.REPORT_IMAGE_FORMAT
+    buf = BytesIO()
+    fig.savefig(buf, format="svg" if fmt == "svg" else "png", dpi=dpi,
+                bbox_inches="tight", facecolor="white")
+    plt.close(fig)
+    if fmt == "webp":
+        from PIL import Image
+        buf.seek(0)
+        out = BytesIO()
+        Image.open(buf).save(out, "WEBP", quality=85, method=4)
+        buf = out
+    encoded = base64.b64encode(buf.getvalue()).decode("utf-8")
+    return f"data:{_MIME_TYPES[fmt]};base64,{encoded}"
+
+
+def plot_density(scores, label, threshold=60):
+    """Histogram of scores (a float array, NaN for missing) around the cutoff."""
+    # Scores are whole percentages, so one bincount gives every 1-point bin
+    scores = scores[~np.isnan(scores)].astype(np.intp)
+    fig, ax = plt.subplots(figsize=(5.5, 3.5), layout="constrained")
+
+    lowest = scores.min()
+    counts = np.bincount(scores - lowest)
+    values = np.arange(lowest, lowest + len(counts))
+    # One bar call per side with a scalar colour, not a per-bar colour array
+    above = values >= threshold
+    for side, color in [(~above, "#d94a4a"), (above, "#4a90d9")]:
+        ax.bar(values[side], counts[side], width=1.0, color=color, edgecolor="white", linewidth=0.5)
 
     ax.axvline(threshold, color="#333", linewidth=1.5, linestyle="--", alpha=0.8)
     ax.text(threshold + 0.5, ax.get_ylim()[1] * 0.92, f"Cutoff = {threshold}%",
@@ -54,32 +91,45 @@ def plot_density(df, col, label, threshold=60):
     ax.set_title(f"Distribution of {label}", fontsize=11, fontweight="600")
     ax.spines[["top", "right"]].set_visible(False)
     ax.tick_params(labelsize=9)
-    fig.tight_layout()
-    return fig_to_base64(fig)
+    return fig_to_data_uri(fig)
+
+
+def quadratic_fit(x, y):
+    """
+    Least-squares coefficients (b0, b1, b2) of y ~ b0 + b1*x + b2*x^2.
 
+    Solves the 3x3 normal equations directly instead of going through
+    np.polyfit's Vandermonde + SVD; falls back to lstsq when they are
+    singular (fewer than three distinct x values).
+    """
+    X = np.column_stack([np.ones_like(x), x, x * x])
+    try:
+        return np.linalg.solve(X.T @ X, X.T @ y)
+    except np.linalg.LinAlgError:
+        return np.linalg.lstsq(X, y, rcond=None)[0]
 
-def plot_rdd_scatter(df, running_col, outcome_col, running_label, outcome_label, threshold=60):
-    """Binned scatter with local polynomial fits on each side."""
-    data = df[[running_col, outcome_col]].dropna()
-    x = data[running_col].values  # already centered
-    y = data[outcome_col].values
 
-    fig, ax = plt.subplots(figsize=(6, 4))
+def plot_rdd_scatter(x, y, running_label, outcome_label, threshold=60):
+    """Binned scatter with local polynomial fits on each side.
 
-    # Bin scatter (2-unit bins)
+    `x` is the running variable (already centered) and `y` the outcome,
+    as float arrays; pairs with either value missing are skipped.
+    """
+    keep = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[keep], y[keep]
+
+    fig, ax = plt.subplots(figsize=(6, 4), layout="constrained")
+
+    # Bin scatter (2-unit bins): per-bin counts and sums of y in two bincounts
     bin_width = 2
-    x_min, x_max = x.min(), x.max()
-    bin_edges = np.arange(x_min - 0.5, x_max + bin_width + 0.5, bin_width)
-    bin_centers = []
-    bin_means = []
-    bin_colors = []
-    for i in range(len(bin_edges) - 1):
-        mask = (x >= bin_edges[i]) & (x < bin_edges[i + 1])
-        if mask.sum() >= 3:
-            bc = (bin_edges[i] + bin_edges[i + 1]) / 2
-            bin_centers.append(bc)
-            bin_means.append(y[mask].mean())
-            bin_colors.append("#4a90d9" if bc >= 0 else "#d94a4a")
+    start = x.min() - 0.5
+    idx = np.floor((x - start) / bin_width).astype(np.intp)
+    counts = np.bincount(idx)
+    sums = np.bincount(idx, weights=y)
+    valid = counts >= 3
+    bin_centers = (start + (np.arange(len(counts)) + 0.5) * bin_width)[valid]
+    bin_means = sums[valid] / counts[valid]
+    bin_colors = np.where(bin_centers >= 0, "#4a90d9", "#d94a4a")
 
     ax.scatter(bin_centers, bin_means, c=bin_colors, s=30, zorder=5, edgecolors="white", linewidth=0.5)
 
@@ -89,10 +139,9 @@ def plot_rdd_scatter(df, running_col, outcome_col, running_label, outcome_label,
         xs, ys = x[mask], y[mask]
         if len(xs) < 5:
             continue
-        coeffs = np.polyfit(xs, ys, 2)
-        poly = np.poly1d(coeffs)
+        b0, b1, b2 = quadratic_fit(xs, ys)
         x_fit = np.linspace(xs.min(), xs.max(), 200)
-        ax.plot(x_fit, poly(x_fit), color=color, linewidth=2, alpha=0.85)
+        ax.plot(x_fit, b0 + b1 * x_fit + b2 * x_fit * x_fit, color=color, linewidth=2, alpha=0.85)
 
     ax.axvline(0, color="#333", linewidth=1.2, linestyle="--", alpha=0.6)
 
@@ -101,8 +150,13 @@ def plot_rdd_scatter(df, running_col, outcome_col, running_label, outcome_label,
     ax.set_title(f"{outcome_label} vs. {running_label}", fontsize=11, fontweight="600")
     ax.spines[["top", "right"]].set_visible(False)
     ax.tick_params(labelsize=9)
-    fig.tight_layout()
-    return fig_to_base64(fig)
+    return fig_to_data_uri(fig)
+
+
+def _plot_task(task):
+    """Render one (plot function, args) task; runs in a worker process."""
+    plot, args = task
+    return plot(*args)
 
 
 # ── Table formatting ──────────────────────────────────────────────────────────
@@ -134,36 +188,53 @@ def fmt(val, decimals=4, is_int=False):
     return f"{val:.{decimals}f}"
 
 
-def build_results_table(results_df, score, outcome):
-    subset = results_df[
-        (results_df["Score"] == score) & (results_df["Outcome"] == outcome)
-    ]
+# Result columns used by the tables, mapped to itertuples-safe names
+RESULT_FIELDS = {
+    "Method": "method",
+    "Controls": "controls",
+    "Coef": "coef",
+    "SE": "se",
+    "p-value": "pvalue",
+    "CI Lower": "ci_lower",
+    "CI Upper": "ci_upper",
+    "BW": "bw",
+    "N (eff)": "n_eff",
+    "N": "n",
+    "Error": "error",
+}
+RESULT_COLS = {"Score", "Outcome", *RESULT_FIELDS}
+
+
+def build_results_table(subset):
+    """Render the results rows of one (Score, Outcome) group as an HTML table."""
     if subset.empty:
         return ""
 
-    rows_html = ""
-    for _, r in subset.iterrows():
-        if pd.notna(r.get("Error")):
+    # Positional tuples with attribute names; optional columns come back NaN
+    subset = subset.reindex(columns=list(RESULT_FIELDS)).rename(columns=RESULT_FIELDS)
+    rows = []
+    for r in subset.itertuples(index=False):
+        if pd.notna(r.error):
             continue
-        method = r["Method"]
-        ctrl = r["Controls"]
-        coef = fmt(r["Coef"])
-        se = fmt(r["SE"])
-        pv = fmt(r["p-value"])
-        st = stars_html(r["p-value"])
-        ci_l = fmt(r.get("CI Lower"))
-        ci_u = fmt(r.get("CI Upper"))
+        method = r.method
+        ctrl = r.controls
+        coef = fmt(r.coef)
+        se = fmt(r.se)
+        pv = fmt(r.pvalue)
+        st = stars_html(r.pvalue)
+        ci_l = fmt(r.ci_lower)
+        ci_u = fmt(r.ci_upper)
         ci = f"[{ci_l}, {ci_u}]"
 
-        n_val = r.get("N (eff)") if pd.notna(r.get("N (eff)")) else r.get("N")
+        n_val = r.n_eff if pd.notna(r.n_eff) else r.n
         n = fmt(n_val, is_int=True) if pd.notna(n_val) else "&mdash;"
-        bw = fmt(r.get("BW"), decimals=2) if pd.notna(r.get("BW")) else "&mdash;"
+        bw = fmt(r.bw, decimals=2) if pd.notna(r.bw) else "&mdash;"
 
         # Highlight preferred spec
         is_preferred = method == "rdrobust" and ctrl == "Yes"
         row_class = ' class="preferred"' if is_preferred else ""
 
-        rows_html += f"""        <tr{row_class}>
+        rows.append(f"""        <tr{row_class}>
           <td>{method}</td>
           <td>{ctrl}</td>
           <td class="num">{coef}{st}</td>
@@ -172,7 +243,8 @@ def build_results_table(results_df, score, outcome):
           <td class="num ci">{ci}</td>
           <td class="num">{n}</td>
           <td class="num">{bw}</td>
-        </tr>\n"""
+        </tr>\n""")
+    rows_html = "".join(rows)
 
     return f"""    <div class="table-wrap"><table>
       <thead>
@@ -194,7 +266,7 @@ def build_results_table(results_df, score, outcome):
 
 # ── HTML assembly ─────────────────────────────────────────────────────────────
 
-HTML_TEMPLATE = """\
+HTML_TEMPLATE = Template("""\
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -202,7 +274,7 @@ HTML_TEMPLATE = """\
 <meta name="viewport" content="width=device-width, initial-scale=1.0">
 <title>RDD Results: Rotten Tomatoes &amp; Box Office Revenue</title>
 <style>
-  :root {{
+  :root {
     --bg: #fff;
     --fg: #1a1a1a;
     --muted: #6b7280;
@@ -211,55 +283,55 @@ HTML_TEMPLATE = """\
     --row-alt: #f9fafb;
     --preferred-bg: #eff6ff;
     --star-color: #b45309;
-  }}
-  *, *::before, *::after {{ box-sizing: border-box; }}
-  body {{
+  }
+  *, *::before, *::after { box-sizing: border-box; }
+  body {
     font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, "Helvetica Neue", Arial, sans-serif;
     color: var(--fg);
     background: var(--bg);
     line-height: 1.6;
     margin: 0;
     padding: 2rem 1rem;
-  }}
-  .container {{
+  }
+  .container {
     max-width: 960px;
     margin: 0 auto;
-  }}
-  h1 {{
+  }
+  h1 {
     font-size: 1.75rem;
     font-weight: 700;
     margin: 0 0 0.25rem;
     letter-spacing: -0.01em;
-  }}
-  .subtitle {{
+  }
+  .subtitle {
     color: var(--muted);
     font-size: 0.95rem;
     margin-bottom: 2rem;
-  }}
-  h2 {{
+  }
+  h2 {
     font-size: 1.25rem;
     font-weight: 600;
     margin: 2.5rem 0 0.75rem;
     padding-bottom: 0.35rem;
     border-bottom: 2px solid var(--border);
-  }}
-  h3 {{
+  }
+  h3 {
     font-size: 1.05rem;
     font-weight: 600;
     margin: 1.5rem 0 0.5rem;
     color: var(--fg);
-  }}
-  p, li {{
+  }
+  p, li {
     font-size: 0.925rem;
     color: #374151;
-  }}
-  table {{
+  }
+  table {
     width: 100%;
     border-collapse: collapse;
     font-size: 0.85rem;
     margin: 0.75rem 0 1.5rem;
-  }}
-  thead th {{
+  }
+  thead th {
     background: #f3f4f6;
     font-weight: 600;
     text-align: left;
@@ -267,88 +339,88 @@ HTML_TEMPLATE = """\
     border-bottom: 2px solid var(--border);
     font-size: 0.8rem;
     white-space: nowrap;
-  }}
-  tbody td {{
+  }
+  tbody td {
     padding: 0.45rem 0.6rem;
     border-bottom: 1px solid var(--border);
-  }}
-  tbody tr:nth-child(even) {{ background: var(--row-alt); }}
-  tbody tr.preferred {{
+  }
+  tbody tr:nth-child(even) { background: var(--row-alt); }
+  tbody tr.preferred {
     background: var(--preferred-bg);
     font-weight: 600;
-  }}
-  .num {{
+  }
+  .num {
     font-family: "SF Mono", "Fira Code", "Consolas", monospace;
     text-align: right;
     font-size: 0.82rem;
     white-space: nowrap;
-  }}
-  .ci {{ font-size: 0.78rem; }}
-  .stars {{
+  }
+  .ci { font-size: 0.78rem; }
+  .stars {
     color: var(--star-color);
     font-weight: 700;
     margin-left: 2px;
-  }}
-  .plot-row {{
+  }
+  .plot-row {
     display: flex;
     gap: 1.25rem;
     flex-wrap: wrap;
     margin: 1rem 0;
-  }}
-  .plot-row img {{
+  }
+  .plot-row img {
     flex: 1 1 300px;
     max-width: 100%;
     height: auto;
     border: 1px solid var(--border);
     border-radius: 4px;
-  }}
-  .plot-single {{
+  }
+  .plot-single {
     margin: 1rem 0;
-  }}
-  .plot-single img {{
+  }
+  .plot-single img {
     max-width: 100%;
     border: 1px solid var(--border);
     border-radius: 4px;
-  }}
-  .notes {{
+  }
+  .notes {
     font-size: 0.8rem;
     color: var(--muted);
     border-top: 1px solid var(--border);
     padding-top: 1rem;
     margin-top: 2rem;
-  }}
-  .notes p {{
+  }
+  .notes p {
     font-size: 0.8rem;
     color: var(--muted);
     margin: 0.25rem 0;
-  }}
-  .findings li {{
+  }
+  .findings li {
     margin-bottom: 0.5rem;
-  }}
-  .table-wrap {{
+  }
+  .table-wrap {
     overflow-x: auto;
     -webkit-overflow-scrolling: touch;
     margin: 0.75rem 0 1.5rem;
-  }}
-  .table-wrap table {{
+  }
+  .table-wrap table {
     margin: 0;
-  }}
-  @media (max-width: 640px) {{
-    body {{ padding: 1rem 0.5rem; }}
-    h1 {{ font-size: 1.35rem; }}
-    h2 {{ font-size: 1.1rem; margin-top: 2rem; }}
-    h3 {{ font-size: 0.95rem; }}
-    p, li {{ font-size: 0.875rem; }}
-    .subtitle {{ font-size: 0.85rem; }}
-    table {{ font-size: 0.7rem; min-width: 580px; }}
-    thead th {{ padding: 0.35rem 0.4rem; font-size: 0.7rem; }}
-    tbody td {{ padding: 0.3rem 0.4rem; }}
-    .num {{ font-size: 0.68rem; }}
-    .ci {{ font-size: 0.65rem; }}
-    .plot-row {{ flex-direction: column; gap: 0.75rem; }}
-    .notes {{ font-size: 0.75rem; }}
-    .notes p {{ font-size: 0.75rem; }}
-  }}
+  }
+  @media (max-width: 640px) {
+    body { padding: 1rem 0.5rem; }
+    h1 { font-size: 1.35rem; }
+    h2 { font-size: 1.1rem; margin-top: 2rem; }
+    h3 { font-size: 0.95rem; }
+    p, li { font-size: 0.875rem; }
+    .subtitle { font-size: 0.85rem; }
+    table { font-size: 0.7rem; min-width: 580px; }
+    thead th { padding: 0.35rem 0.4rem; font-size: 0.7rem; }
+    tbody td { padding: 0.3rem 0.4rem; }
+    .num { font-size: 0.68rem; }
+    .ci { font-size: 0.65rem; }
+    .plot-row { flex-direction: column; gap: 0.75rem; }
+    .notes { font-size: 0.75rem; }
+    .notes p { font-size: 0.75rem; }
+  }
 </style>
 </head>
 <body>
@@ -431,37 +503,37 @@ HTML_TEMPLATE = """\
   that would suggest some kind of manipulation. Things look clean here.
 </p>
 <div class="plot-row">
-  <img src="data:image/png;base64,{density_critic}" alt="Tomatometer distribution">
-  <img src="data:image/png;base64,{density_audience}" alt="Audience Score distribution">
+  <img src="${density_critic}" alt="Tomatometer distribution">
+  <img src="${density_audience}" alt="Audience Score distribution">
 </div>
 
 <h2>Results</h2>
 
 <h3>Panel A: Critic Score (Tomatometer)</h3>
 <p><b>Outcome: Log Opening Weekend Gross</b></p>
-{table_critic_opening}
+${table_critic_opening}
 
 <p><b>Outcome: Log Total Domestic Gross</b> <span style="color:var(--muted)">(excluding films still in theaters)</span></p>
-{table_critic_total}
+${table_critic_total}
 
 <h3>Panel B: Audience Score</h3>
 <p><b>Outcome: Log Opening Weekend Gross</b></p>
-{table_audience_opening}
+${table_audience_opening}
 
 <p><b>Outcome: Log Total Domestic Gross</b> <span style="color:var(--muted)">(excluding films still in theaters)</span></p>
-{table_audience_total}
+${table_audience_total}
 
 <h2>RDD Plots</h2>
 <p>Binned scatter plots with quadratic fits on each side of the cutoff. If the &ldquo;Fresh&rdquo;
 label were causing a jump in revenue, you&rsquo;d see a visible gap at zero. Spoiler: you don&rsquo;t.</p>
 
 <div class="plot-row">
-  <img src="data:image/png;base64,{scatter_critic_opening}" alt="Critic - Opening Gross">
-  <img src="data:image/png;base64,{scatter_critic_total}" alt="Critic - Total Gross">
+  <img src="${scatter_critic_opening}" alt="Critic - Opening Gross">
+  <img src="${scatter_critic_total}" alt="Critic - Total Gross">
 </div>
 <div class="plot-row">
-  <img src="data:image/png;base64,{scatter_audience_opening}" alt="Audience - Opening Gross">
-  <img src="data:image/png;base64,{scatter_audience_total}" alt="Audience - Total Gross">
+  <img src="${scatter_audience_opening}" alt="Audience - Opening Gross">
+  <img src="${scatter_audience_total}" alt="Audience - Total Gross">
 </div>
 
 <h2>What I Found</h2>
@@ -499,51 +571,73 @@ label were causing a jump in revenue, you&rsquo;d see a visible gap at zero. Spo
 </div>
 </body>
 </html>
-"""
+""")
 
 
 def main():
-    df = pd.read_csv(config.DATA_PROCESSED / "merged_dataset.csv")
-    results = pd.read_csv(config.PROJECT_ROOT / "output" / "rdd_results_raw.csv")
+    df = pd.read_parquet(
+        config.DATA_PROCESSED / "merged_dataset.parquet", engine="pyarrow", columns=PLOT_COLS,
+    )
+    # Optional columns (e.g. Error) may be absent, so select by callable
+    results = pd.read_csv(
+        config.PROJECT_ROOT / "output" / "rdd_results_raw.csv",
+        usecols=lambda c: c in RESULT_COLS,
+    )
 
     print("Generating plots...")
 
-    # Density plots
-    density_critic = plot_density(df, "tomatometer", "Tomatometer")
-    density_audience = plot_density(df, "audience_score", "Audience Score")
-
-    # RDD scatter plots (exclude in_theaters for total gross)
-    df_complete = df[df["in_theaters"] == False]
-
-    scatter_critic_opening = plot_rdd_scatter(
-        df, "tomatometer_centered", "log_opening_gross",
-        "Tomatometer", "Log Opening Gross")
-    scatter_critic_total = plot_rdd_scatter(
-        df_complete, "tomatometer_centered", "log_total_gross",
-        "Tomatometer", "Log Total Gross")
-    scatter_audience_opening = plot_rdd_scatter(
-        df, "audience_score_centered", "log_opening_gross",
-        "Audience Score", "Log Opening Gross")
-    scatter_audience_total = plot_rdd_scatter(
-        df_complete, "audience_score_centered", "log_total_gross",
-        "Audience Score", "Log Total Gross")
+    # Each column is pulled out as a float array once; the total-gross
+    # scatters (which exclude films still in theaters) slice these arrays
+    # with one mask instead of filtering a second copy of the frame
+    arr = {
+        col: df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        for col in PLOT_COLS if col != "in_theaters"
+    }
+    released = (df["in_theaters"] == False).to_numpy()
+
+    # The figures are independent and each is CPU-bound in Agg rendering,
+    # so they are drawn in parallel worker processes from plain arrays
+    plots = {
+        "density_critic": (plot_density, (arr["tomatometer"], "Tomatometer")),
+        "density_audience": (plot_density, (arr["audience_score"], "Audience Score")),
+        "scatter_critic_opening": (plot_rdd_scatter, (
+            arr["tomatometer_centered"], arr["log_opening_gross"],
+            "Tomatometer", "Log Opening Gross")),
+        "scatter_critic_total": (plot_rdd_scatter, (
+            arr["tomatometer_centered"][released], arr["log_total_gross"][released],
+            "Tomatometer", "Log Total Gross")),
+        "scatter_audience_opening": (plot_rdd_scatter, (
+            arr["audience_score_centered"], arr["log_opening_gross"],
+            "Audience Score", "Log Opening Gross")),
+        "scatter_audience_total": (plot_rdd_scatter, (
+            arr["audience_score_centered"][released], arr["log_total_gross"][released],
+            "Audience Score", "Log Total Gross")),
+    }
+    # No more workers than cores; on a single core the pool would only add
+    # process start-up and pickling, so the figures are drawn in-process
+    workers = min(len(plots), os.cpu_count() or 1)
+    if workers == 1:
+        images = {name: _plot_task(task) for name, task in plots.items()}
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            images = dict(zip(plots, pool.map(_plot_task, plots.values())))
 
     print("Building tables...")
 
-    table_critic_opening = build_results_table(results, "Critic", "Log Opening Gross")
-    table_critic_total = build_results_table(results, "Critic", "Log Total Gross")
-    table_audience_opening = build_results_table(results, "Audience", "Log Opening Gross")
-    table_audience_total = build_results_table(results, "Audience", "Log Total Gross")
+    # Split the results by (Score, Outcome) in one pass rather than masking
+    # the whole frame once per table
+    groups = dict(tuple(results.groupby(["Score", "Outcome"], sort=False)))
+    empty = results.iloc[:0]
+
+    table_critic_opening = build_results_table(groups.get(("Critic", "Log Opening Gross"), empty))
+    table_critic_total = build_results_table(groups.get(("Critic", "Log Total Gross"), empty))
+    table_audience_opening = build_results_table(groups.get(("Audience", "Log Opening Gross"), empty))
+    table_audience_total = build_results_table(groups.get(("Audience", "Log Total Gross"), empty))
 
     print("Assembling HTML...")
 
-    html = HTML_TEMPLATE.format(
-        density_critic=density_critic,
-        density_audience=density_audience,
-        scatter_critic_opening=scatter_critic_opening,
-        scatter_critic_total=scatter_critic_total,
-        scatter_audience_opening=scatter_audience_opening,
-        scatter_audience_total=scatter_audience_total,
+    fields = dict(
+        images,
         table_critic_opening=table_critic_opening,
         table_critic_total=table_critic_total,
         table_audience_opening=table_audience_opening,
@@ -551,12 +645,13 @@ def main():
     )
 
     output_path = config.PROJECT_ROOT / "output" / "rdd_report.html"
-    output_path.write_text(html, encoding="utf-8")
+    with output_path.open("w", encoding="utf-8") as f:
+        f.write(HTML_TEMPLATE.substitute(fields))
     print(f"Report saved to {output_path}")
 
     docs_path = config.PROJECT_ROOT / "docs" / "index.html"
     docs_path.parent.mkdir(exist_ok=True)
-    docs_path.write_text(html, encoding="utf-8")
+    shutil.copyfile(output_path, docs_path)
     print(f"GitHub Pages copy saved to {docs_path}")
 
 
@@ -3,14 +3,24 @@ Shared utility functions for the data collection pipeline.
 Provides HTTP request handling, text normalization, parsing, logging, and checkpointing.
 """
 
+import csv
+import functools
+import io
 import logging
 import re
+import threading
 import time
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
 from pathlib import Path
+from urllib.parse import urlsplit
 
+from lxml import html as lh
+import numpy as np
 import pandas as pd
 import requests
+import requests_cache
+from requests.adapters import HTTPAdapter
 
 # Add parent directory to path so we can import config
 import sys
@@ -18,6 +28,141 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 import config
 
 
+# Shared session so repeated requests to the same host reuse pooled
+# keep-alive connections instead of paying a TCP+TLS handshake per URL.
+# Successful responses are also cached on disk, so re-runs of the pipeline
+# read unchanged pages locally instead of re-fetching them.
+_SESSION = requests_cache.CachedSession(
+    config.CACHE_DIR / "http.sqlite",
+    backend="sqlite",
+    expire_after=timedelta(days=config.HTTP_CACHE_EXPIRE_DAYS),
+    allowable_codes=(200,),
+)
+_ADAPTER = HTTPAdapter(
+    pool_connections=config.HTTP_POOL_CONNECTIONS,
+    pool_maxsize=config.HTTP_POOL_MAXSIZE,
+    max_retries=0,
+)
+_SESSION.mount("https://", _ADAPTER)
+_SESSION.mount("http://", _ADAPTER)
+_SESSION.headers.update(config.HEADERS)
+
+
+# BOM, The Numbers and RT all serve UTF-8; pinning the encoding lets lxml
+# decode raw response bytes itself instead of relying on a <meta charset>.
+# The scrapers never look up ids, comments or processing instructions, so
+# skip building them, and never let the parser touch the network.
+_HTML_PARSER = lh.HTMLParser(
+    encoding="utf-8",
+    collect_ids=False,
+    no_network=True,
+    remove_comments=True,
+    remove_pis=True,
+)
+
+
+class RateLimiter:
+    """
+    Thread-safe minimum-interval limiter. Successive wait() calls, from any
+    thread, return at least `interval` seconds apart, so a pool of workers
+    sharing one limiter keeps the same request rate as a sequential loop.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self, extra=0.0):
+        """Block until the next slot; `extra` widens the gap after it
+        (e.g. a throttle penalty) for every thread sharing the limiter."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval + extra
+        time.sleep(slot - now)
+
+
+# Map of host -> monotonic time of the latest request slot handed out for
+# it. Shared by all threads, so a pool of workers hitting the same host keeps
+# the same per-host rate as a sequential loop and only overlaps latency and
+# parsing with the waits.
+_LAST_REQUEST = {}
+_LAST_REQUEST_LOCK = threading.Lock()
+
+
+# Extra per-host spacing learned from 429/503 responses. Shared by all
+# threads, since a throttled host is throttled for every worker. It doubles
+# on each throttle and halves on each success, so the effective interval
+# falls back to the caller's delay once the server is happy again.
+_HOST_PENALTY = {}
+_PENALTY_LOCK = threading.Lock()
+_MAX_PENALTY = 60.0
+
+
+def _slow_down(host, delay):
+    with _PENALTY_LOCK:
+        current = _HOST_PENALTY.get(host, 0.0)
+        _HOST_PENALTY[host] = min(max(delay, 1.0, 2 * current), _MAX_PENALTY)
+
+
+def _speed_up(host):
+    with _PENALTY_LOCK:
+        current = _HOST_PENALTY.get(host)
+        if current is None:
+            return
+        if current / 2 < 0.1:
+            del _HOST_PENALTY[host]
+        else:
+            _HOST_PENALTY[host] = current / 2
+
+
+def _retry_after(resp, default):
+    """
+    Seconds to wait according to a Retry-After header, else `default`,
+    capped at config.MAX_RETRY_AFTER so a huge or bogus value cannot park
+    a worker for hours.
+    """
+    value = resp.headers.get("Retry-After")
+    if not value:
+        wait = default
+    else:
+        try:
+            wait = float(value)
+        except ValueError:
+            try:
+                when = parsedate_to_datetime(value)
+                wait = (when - datetime.now(timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                wait = default
+    if wait != wait:  # NaN from float("nan")
+        wait = default
+    return min(max(0.0, wait), config.MAX_RETRY_AFTER)
+
+
+def pace_host(host, delay):
+    """
+    Wait until at least `delay` seconds (plus any throttle penalty) have
+    passed since the previous request to `host` from any thread. Time
+    already spent since then (e.g. parsing) counts towards the delay.
+
+    The slot is reserved under the lock and slept on outside it, as in
+    RateLimiter.wait, so waiting threads queue up one `delay` apart.
+    """
+    delay += _HOST_PENALTY.get(host, 0.0)
+    with _LAST_REQUEST_LOCK:
+        now = time.monotonic()
+        last = _LAST_REQUEST.get(host)
+        slot = now if last is None else max(now, last + delay)
+        _LAST_REQUEST[host] = slot
+    time.sleep(slot - now)
+
+
+def get_session():
+    """Return the shared module-level requests.Session used by make_request."""
+    return _SESSION
+
+
 def setup_logging(script_name):
     """Configure logging with console (INFO) and file (DEBUG) handlers."""
     config.LOG_DIR.mkdir(parents=True, exist_ok=True)
@@ -46,18 +191,32 @@ def setup_logging(script_name):
 
 
 def make_request(url, headers=None, delay=1.5, max_retries=None, timeout=None,
-                 session=None, logger=None):
+                 session=None, logger=None, force_refresh=False, limiter=None,
+                 params=None):
     """
     HTTP GET with rate limiting, retries, and exponential backoff.
 
+    When the session has a response cache (the shared default does), cached
+    responses are returned immediately without the rate-limit delay. Network
+    requests are spaced `delay` seconds apart per host, across all threads,
+    counting time already spent (e.g. parsing) since the previous request
+    rather than always sleeping the full delay. A 429 or 503 widens that
+    spacing for the host (honouring Retry-After) until successful responses
+    bring it back down.
+
     Args:
         url: URL to fetch
         headers: HTTP headers dict (defaults to config.HEADERS)
-        delay: seconds to sleep before the request
+        delay: minimum seconds between consecutive requests to the same host
         max_retries: number of retry attempts (defaults to config.MAX_RETRIES)
         timeout: request timeout in seconds (defaults to config.REQUEST_TIMEOUT)
-        session: optional requests.Session for cookie persistence
+        session: optional requests.Session (defaults to the shared pooled session)
         logger: optional logger instance
+        force_refresh: bypass the response cache and re-fetch from the network
+        limiter: optional shared RateLimiter that replaces the per-call delay,
+            for callers issuing requests from several threads; throttle
+            penalties for the host still widen its spacing
+        params: optional query-string dict, URL-encoded by requests
 
     Returns:
         requests.Response or None on complete failure
@@ -71,26 +230,48 @@ def make_request(url, headers=None, delay=1.5, max_retries=None, timeout=None,
     if logger is None:
         logger = logging.getLogger(__name__)
 
-    requester = session if session else requests
+    requester = session if session else _SESSION
 
+    cache_kwargs = {}
+    if isinstance(requester, requests_cache.CacheMixin):
+        if force_refresh:
+            cache_kwargs["force_refresh"] = True
+        else:
+            # 504 here just means "not cached"; fall through to the network
+            resp = requester.get(url, params=params, headers=headers,
+                                 timeout=timeout, only_if_cached=True)
+            if resp.status_code == 200:
+                logger.debug(f"GET {url} -> 200 (cached)")
+                return resp
+
+    host = urlsplit(url).netloc
     for attempt in range(1, max_retries + 1):
-        time.sleep(delay)
+        if limiter:
+            limiter.wait(_HOST_PENALTY.get(host, 0.0))
+        else:
+            pace_host(host, delay)
         try:
-            resp = requester.get(url, headers=headers, timeout=timeout)
+            resp = requester.get(url, params=params, headers=headers,
+                                 timeout=timeout, **cache_kwargs)
             logger.debug(f"GET {url} -> {resp.status_code}")
 
             if resp.status_code == 200:
+                _speed_up(host)
                 return resp
             elif resp.status_code == 429:
-                wait = 60
-                logger.warning(f"Rate limited (429) on {url}. Waiting {wait}s...")
+                wait = _retry_after(resp, 60)
+                _slow_down(host, delay)
+                logger.warning(f"Rate limited (429) on {url}. Waiting {wait:.0f}s...")
                 time.sleep(wait)
             elif resp.status_code == 403:
                 wait = 60
                 logger.warning(f"Forbidden (403) on {url}. Waiting {wait}s...")
                 time.sleep(wait)
             elif resp.status_code >= 500:
-                wait = config.RETRY_BACKOFF * attempt
+                wait = config.RETRY_BACKOFF * 2 ** (attempt - 1)
+                if resp.status_code == 503:
+                    wait = _retry_after(resp, wait)
+                    _slow_down(host, delay)
                 logger.warning(
                     f"Server error ({resp.status_code}) on {url}. "
                     f"Retry {attempt}/{max_retries} in {wait}s..."
@@ -101,7 +282,7 @@ def make_request(url, headers=None, delay=1.5, max_retries=None, timeout=None,
                 return resp  # 404 etc. — don't retry
 
         except (requests.ConnectionError, requests.Timeout) as e:
-            wait = config.RETRY_BACKOFF * attempt
+            wait = config.RETRY_BACKOFF * 2 ** (attempt - 1)
             logger.warning(
                 f"Request error on {url}: {e}. "
                 f"Retry {attempt}/{max_retries} in {wait}s..."
@@ -112,6 +293,13 @@ def make_request(url, headers=None, delay=1.5, max_retries=None, timeout=None,
     return None
 
 
+_PAREN_RE = re.compile(r"\(.*?\)")
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_WS_RE = re.compile(r"\s+")
+_ARTICLES = ("the ", "a ", "an ")
+
+
+@functools.lru_cache(maxsize=8192)
 def normalize_title(title):
     """
     Normalize a movie title for fuzzy matching.
@@ -133,17 +321,46 @@ def normalize_title(title):
     if not title:
         return ""
     s = title.lower().strip()
-    s = re.sub(r"\(.*?\)", "", s)  # remove parenthetical content
+    s = _PAREN_RE.sub("", s)  # remove parenthetical content
     s = s.replace("&", "and")
-    s = re.sub(r"[^\w\s]", " ", s)  # remove punctuation
-    s = re.sub(r"\s+", " ", s).strip()  # collapse whitespace
+    s = _PUNCT_RE.sub(" ", s)  # remove punctuation
+    s = _WS_RE.sub(" ", s).strip()  # collapse whitespace
     # Strip leading articles
-    for article in ["the ", "a ", "an "]:
+    for article in _ARTICLES:
         if s.startswith(article):
             s = s[len(article):]
     return s
 
 
+def normalize_title_series(titles):
+    """
+    normalize_title over a Series, computed once per distinct title.
+
+    Re-releases and repeated titles share one result via a dict lookup;
+    missing titles normalize to "" as in normalize_title.
+    """
+    table = {t: normalize_title(t) for t in titles.dropna().unique()}
+    return titles.map(table).fillna("")
+
+
+def parse_html(content):
+    """
+    Parse an HTML document into an lxml tree.
+
+    Takes the raw response bytes (resp.content) so requests never has to
+    decode the body to str via charset detection first.
+    """
+    return lh.fromstring(content, parser=_HTML_PARSER)
+
+
+def node_text(element):
+    """
+    Return the stripped text of an lxml element, concatenating every
+    descendant text node (equivalent to BeautifulSoup's get_text(strip=True)).
+    """
+    return "".join(t.strip() for t in element.itertext())
+
+
 def parse_money(text):
     """
     Parse dollar strings into integer values.
@@ -172,6 +389,31 @@ def parse_money(text):
         return None
 
 
+_MONEY_MULTIPLIERS = {"": 1, "K": 1_000, "M": 1_000_000, "B": 1_000_000_000}
+
+
+def parse_money_series(values):
+    """
+    Vectorized parse_money over a Series of dollar strings.
+
+    Same rules as parse_money ("$" and commas dropped, optional K/M/B suffix,
+    placeholders like "-" or "n/a" missing), applied column-wide with string
+    ops. Returns float64 so the column stays numeric, NaN where unparseable.
+    """
+    text = values.astype("string").str.replace(r"[$,]", "", regex=True).str.strip().str.upper()
+    parts = text.str.extract(r"^([-+]?(?:\d+\.?\d*|\.\d+))([KMB]?)$")
+    amount = pd.to_numeric(parts[0], errors="coerce") * parts[1].map(_MONEY_MULTIPLIERS)
+    return np.trunc(amount.astype("float64"))
+
+
+DATE_FORMATS = [
+    "%b %d, %Y",   # "Jun 14, 2024"
+    "%B %d, %Y",   # "June 14, 2024"
+    "%Y-%m-%d",    # "2024-06-14"
+    "%m/%d/%Y",    # "06/14/2024"
+]
+
+
 def parse_date(text, formats=None):
     """
     Parse date strings from various formats.
@@ -187,15 +429,7 @@ def parse_date(text, formats=None):
         return None
     text = text.strip()
 
-    if formats is None:
-        formats = [
-            "%b %d, %Y",   # "Jun 14, 2024"
-            "%B %d, %Y",   # "June 14, 2024"
-            "%Y-%m-%d",    # "2024-06-14"
-            "%m/%d/%Y",    # "06/14/2024"
-        ]
-
-    for fmt in formats:
+    for fmt in formats or DATE_FORMATS:
         try:
             return datetime.strptime(text, fmt).date()
         except ValueError:
@@ -203,22 +437,148 @@ def parse_date(text, formats=None):
     return None
 
 
+def parse_date_series(values, formats=None):
+    """
+    Vectorized parse_date: parse a Series of date strings in one pass per format.
+
+    Each format is tried over the whole column and the first successful parse
+    wins, so results match parse_date row for row. Returns datetime64 (NaT
+    where nothing parsed).
+    """
+    text = values.astype("string").str.strip()
+    parsed = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+    for fmt in formats or DATE_FORMATS:
+        parsed = parsed.fillna(pd.to_datetime(text, format=fmt, errors="coerce"))
+    return parsed
+
+
+# Dataset part files (checkpoints) use zstd rather than pyarrow's default
+# snappy: the scraped text columns compress much better, and parts are
+# written once per batch, so the extra encode time is negligible
+_PART_COMPRESSION = "zstd"
+
+
+def _parquet_parts(path):
+    """Part files of a Parquet dataset directory, in write order."""
+    return sorted(Path(path).glob("part-*.parquet"))
+
+
+def _next_part(path):
+    """Path for a new part file that sorts after every existing one."""
+    parts = _parquet_parts(path)
+    index = int(parts[-1].stem.split("-")[1]) + 1 if parts else 0
+    return Path(path) / f"part-{index:05d}.parquet"
+
+
+def write_table(df, path):
+    """
+    Write a DataFrame as Parquet (pyarrow) or CSV, chosen by file suffix.
+
+    If `path` is an existing Parquet dataset directory (see save_checkpoint),
+    its parts are replaced by a single part holding `df`.
+
+    The table is written to a temp name and renamed into place, so a crash
+    mid-write never leaves a torn file. Old dataset parts are deleted only
+    once the new part is in place; if that is interrupted, the new part
+    sorts last and its rows win wherever duplicates are resolved keep="last".
+    """
+    path = Path(path)
+    old_parts = []
+    compression = "snappy"
+    if path.suffix == ".parquet" and path.is_dir():
+        old_parts = _parquet_parts(path)
+        path = _next_part(path)
+        compression = _PART_COMPRESSION
+    tmp = path.with_name(path.name + ".tmp")
+    if path.suffix == ".parquet":
+        df.to_parquet(tmp, engine="pyarrow", compression=compression, index=False)
+    else:
+        df.to_csv(tmp, index=False)
+    tmp.replace(path)
+    for part in old_parts:
+        part.unlink()
+
+
+def read_table(path, columns=None):
+    """
+    Read a table written by write_table or save_checkpoint.
+
+    Parquet or CSV by file suffix; a .parquet directory is read as the
+    concatenation of its part files. `columns` optionally limits the read.
+    CSVs go through pyarrow's multithreaded reader rather than pandas' C
+    parser; it infers the same dtypes (ISO dates aside, which arrive as dates).
+    """
+    path = Path(path)
+    if path.suffix == ".parquet":
+        if path.is_dir():
+            parts = [
+                pd.read_parquet(part, engine="pyarrow", columns=columns)
+                for part in _parquet_parts(path)
+            ]
+            if not parts:
+                return pd.DataFrame(columns=columns)
+            # A part whose column was all-None comes back as object dtype;
+            # re-infer so the combined column matches a single-file read
+            return pd.concat(parts, ignore_index=True).infer_objects()
+        return pd.read_parquet(path, engine="pyarrow", columns=columns)
+    return pd.read_csv(path, engine="pyarrow", usecols=columns)
+
+
+def checkpoint_path(name):
+    """
+    Path of the resumable raw table `name` (e.g. "bom_details") in
+    config.CHECKPOINT_FORMAT: a .parquet dataset directory or a .csv file.
+
+    A CSV checkpoint left by an earlier run (before the Parquet format) is
+    imported as the dataset's first part, so resuming does not start over.
+    """
+    if config.CHECKPOINT_FORMAT == "csv":
+        return config.DATA_RAW / f"{name}.csv"
+
+    path = config.DATA_RAW / f"{name}.parquet"
+    legacy = config.DATA_RAW / f"{name}.csv"
+    if not _parquet_parts(path) and legacy.exists() and legacy.stat().st_size > 0:
+        path.mkdir(parents=True, exist_ok=True)
+        write_table(read_table(legacy), path)
+        logging.getLogger(__name__).warning(
+            f"Imported legacy checkpoint {legacy.name} into {path.name}/; "
+            f"the CSV is no longer read and can be deleted"
+        )
+    return path
+
+
 def load_checkpoint(filepath):
     """
-    Load existing CSV to get set of already-processed IDs.
+    Load an existing checkpoint to get set of already-processed IDs.
+
+    Only the bom_release_id column is read; callers just need the ID set
+    to decide what is left to scrape.
 
     Args:
-        filepath: Path to the checkpoint CSV
+        filepath: Path to the checkpoint CSV, or a .parquet dataset directory
 
     Returns:
-        (DataFrame or None, set of processed IDs)
+        (DataFrame of processed IDs or None, set of processed IDs)
     """
     filepath = Path(filepath)
+    if filepath.suffix == ".parquet":
+        if not _parquet_parts(filepath):
+            return None, set()
+        try:
+            df = read_table(filepath, columns=["bom_release_id"])
+            return df, set(df["bom_release_id"].dropna().astype(str))
+        except Exception:
+            return None, set()
+
     if filepath.exists() and filepath.stat().st_size > 0:
         try:
-            df = pd.read_csv(filepath)
+            df = pd.read_csv(
+                filepath,
+                usecols=lambda col: col == "bom_release_id",
+                dtype=str,
+            )
             if "bom_release_id" in df.columns:
-                processed = set(df["bom_release_id"].dropna().astype(str))
+                processed = set(df["bom_release_id"].dropna())
             else:
                 processed = set()
             return df, processed
@@ -229,25 +589,59 @@ def load_checkpoint(filepath):
 
 def save_checkpoint(new_rows, filepath, logger=None):
     """
-    Append new rows to an existing CSV or create it.
+    Append new rows to an existing checkpoint or create it.
+
+    Only the new rows are written (the existing data is never re-read), so
+    each checkpoint costs O(batch) rather than O(file).
+
+    - CSV: rows go straight through csv.DictWriter onto the end of the file;
+      no DataFrame is built per flush.
+    - .parquet: the path is a dataset directory and each batch becomes one
+      new part file in it; read_table concatenates the parts.
 
     Args:
         new_rows: list of dicts to append
-        filepath: Path to the output CSV
+        filepath: Path to the output CSV or .parquet directory
         logger: optional logger
     """
     if not new_rows:
         return
 
     filepath = Path(filepath)
-    new_df = pd.DataFrame(new_rows)
+    if filepath.suffix == ".parquet":
+        filepath.mkdir(parents=True, exist_ok=True)
+        part = _next_part(filepath)
+        pd.DataFrame(new_rows).to_parquet(
+            part, engine="pyarrow", compression=_PART_COMPRESSION, index=False
+        )
+        if logger:
+            logger.info(
+                f"Checkpoint saved: {len(new_rows)} rows written to "
+                f"{filepath.name}/{part.name}"
+            )
+        return
 
-    if filepath.exists() and filepath.stat().st_size > 0:
-        existing = pd.read_csv(filepath)
-        combined = pd.concat([existing, new_df], ignore_index=True)
+    is_new = not filepath.exists() or filepath.stat().st_size == 0
+
+    if is_new:
+        # Union of keys in first-seen order, as pd.DataFrame(new_rows) would
+        fieldnames = list(dict.fromkeys(k for row in new_rows for k in row))
     else:
-        combined = new_df
+        # Keep the column order fixed by the existing header
+        with open(filepath, newline="", encoding="utf-8") as f:
+            fieldnames = next(csv.reader(f))
+
+    # Serialize the whole batch first, then append it with a single write:
+    # a row that fails to encode can no longer leave a half-written batch
+    # behind, and a resumed run never sees a torn final line.
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=fieldnames, extrasaction="ignore")
+    if is_new:
+        writer.writeheader()
+    writer.writerows(new_rows)
+
+    with open(filepath, "a", newline="", encoding="utf-8") as f:
+        f.write(buf.getvalue())
 
-    combined.to_csv(filepath, index=False)
     if logger:
-        logger.info(f"Checkpoint saved: {len(combined)} total rows in {filepath.name}")
+        logger.info(f"Checkpoint saved: {len(new_rows)} rows appended to {filepath.name}")